@@ -37,14 +37,17 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     "rest_framework",
     "rest_framework.authtoken",
-    "core",
+    "core.apps.CoreConfig",
     "user",
-    "recipe",
+    "recipe.apps.RecipeConfig",
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.instrumentation.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,11 +83,51 @@ WSGI_APPLICATION = 'app.wsgi.application'
 
 DATABASES = {
     'default': {
-        "ENGINE": "django.db.backends.postgresql",
+        # django.db.backends.postgresql with the health checks of
+        # DB_HEALTH_CHECKS
+        "ENGINE": "core.backends.postgresql",
         "HOST": os.environ.get('DB_HOST'),
         "NAME": os.environ.get('DB_NAME'),
         "USER": os.environ.get('DB_USER'),
         "PASSWORD": os.environ.get('DB_PASS'),
+        # Seconds a connection is kept for the next requests of its
+        # thread, 0 closes it after every request
+        "CONN_MAX_AGE": int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        "OPTIONS": {
+            "connect_timeout": int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+        },
+    }
+}
+
+# Check kept connections with a query on their first use in a request
+# and drop the dead ones, see core.db
+DB_HEALTH_CHECKS = os.environ.get('DB_HEALTH_CHECKS', '1') == '1'
+
+# Connection budget: the server processes and threads per process, and
+# the connections the database allows them. A system check warns when
+# the threads of all processes, the read and image pools included, may
+# need more
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+WEB_THREADS = int(os.environ.get('WEB_THREADS', 1))
+DB_MAX_CONNECTIONS = (
+    int(os.environ['DB_MAX_CONNECTIONS'])
+    if os.environ.get('DB_MAX_CONNECTIONS') else None
+)
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+# The recipe response cache is only coherent across processes when every
+# process shares this backend, the local memory default suits a single
+# process.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
@@ -133,8 +176,101 @@ STATIC_ROOT='/vol/web/static'
 
 AUTH_USER_MODEL = "core.User"
 
-# REST_FRAMEWORK = {
-#     'DEFAULT_AUTHENTICATION_CLASSES': [
-#         'rest_framework.authentication.TokenAuthentication',  # <-- And here
-#     ],
-# }
+# Default and maximum page size of the paginated list endpoints
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 100))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 500))
+
+# Largest number of items accepted by the bulk endpoints in one request
+API_MAX_BULK_SIZE = int(os.environ.get('API_MAX_BULK_SIZE', 1000))
+
+# Objects read and rendered at a time by the export endpoints, see
+# recipe.export. Exports are only streamed by WSGI workers: behind an
+# ASGI server the proxy must route /api/recipe/*/export/ to WSGI workers,
+# the ASGI workers answering them with 421
+API_EXPORT_CHUNK_SIZE = int(os.environ.get('API_EXPORT_CHUNK_SIZE', 2000))
+
+# Token authentication cache, see core.authentication. Set
+# TOKEN_AUTH_CACHE_ALIAS to a CACHES alias to share lookups between
+# processes.
+TOKEN_AUTH_CACHE_SIZE = int(os.environ.get('TOKEN_AUTH_CACHE_SIZE', 10000))
+TOKEN_AUTH_CACHE_TTL = int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 30))
+TOKEN_AUTH_CACHE_ALIAS = os.environ.get('TOKEN_AUTH_CACHE_ALIAS')
+
+# Resized derivatives generated for every uploaded recipe image, see
+# recipe.images
+RECIPE_IMAGE_VARIANT_WIDTHS = (320, 640, 1280)
+RECIPE_IMAGE_VARIANT_FORMATS = ('webp', 'jpeg')
+RECIPE_IMAGE_WORKERS = int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+
+# Largest recipe image accepted by upload_image, in bytes
+RECIPE_IMAGE_MAX_UPLOAD_SIZE = int(
+    os.environ.get('RECIPE_IMAGE_MAX_UPLOAD_SIZE', 10 * 2 ** 20)
+)
+
+# Cached responses of the recipe, tag and ingreedient read endpoints,
+# see recipe.cache
+RECIPE_CACHE_ALIAS = os.environ.get('RECIPE_CACHE_ALIAS', 'default')
+RECIPE_CACHE_TIMEOUT = int(os.environ.get('RECIPE_CACHE_TIMEOUT', 300))
+
+# How MEDIA_URL is served: 'static' through django.views.static while
+# DEBUG is on, 'file' with a sendfile capable FileResponse, 'x-accel' or
+# 'x-sendfile' by handing the file over to nginx or Apache, or 'none'
+# when the front proxy serves MEDIA_ROOT directly. For 'x-accel' nginx
+# needs an internal location at MEDIA_ACCEL_REDIRECT_PREFIX aliased to
+# MEDIA_ROOT, see core.media
+MEDIA_SERVE_MODE = os.environ.get('MEDIA_SERVE_MODE', 'static')
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get(
+    'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/'
+)
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 31536000))
+
+# Run the recipe, tag and ingreedient reads as async views on a pool of
+# ASYNC_READ_WORKERS threads, see recipe.async_views. app.asgi turns it
+# on, so it only applies under an ASGI server, which does not serve the
+# exports, see API_EXPORT_CHUNK_SIZE
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS') == '1'
+ASYNC_READ_WORKERS = int(os.environ.get('ASYNC_READ_WORKERS', 8))
+
+# JSON rendering and parsing of the API. The fast classes use orjson when
+# it is installed, set API_FAST_JSON=0 to use DRF's json classes, see
+# core.renderers
+API_FAST_JSON = os.environ.get('API_FAST_JSON', '1') == '1'
+JSON_CLASSES = (
+    ('core.renderers.FastJSONRenderer', 'core.renderers.FastJSONParser')
+    if API_FAST_JSON else
+    ('rest_framework.renderers.JSONRenderer',
+     'rest_framework.parsers.JSONParser')
+)
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        JSON_CLASSES[0],
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        JSON_CLASSES[1],
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+}
+
+# Request profiling, see core.instrumentation. PERF_SAMPLE_RATE is the
+# share of requests profiled, 0 turns it off, though MetricsMiddleware
+# still counts the queries of every request. Profiled requests are
+# logged to core.instrumentation, at warning level when slower than
+# PERF_SLOW_REQUEST_MS, and get a Server-Timing header when
+# PERF_SERVER_TIMING is 1, by default only with DEBUG as the header
+# shows any client the queries of the request
+PERF_SAMPLE_RATE = float(os.environ.get('PERF_SAMPLE_RATE', 0.01))
+PERF_SERVER_TIMING = os.environ.get(
+    'PERF_SERVER_TIMING', '1' if DEBUG else '0'
+) == '1'
+PERF_SLOW_REQUEST_MS = float(os.environ.get('PERF_SLOW_REQUEST_MS', 500))
+
+# Prometheus metrics served at /metrics/, see core.metrics. With several
+# worker processes set PROMETHEUS_MULTIPROC_DIR to an empty directory
+# shared by them, emptied before the server starts, and have the server
+# call prometheus_client.multiprocess.mark_process_dead when a worker
+# exits. The endpoint requires METRICS_TOKEN as a bearer token and
+# answers 404 while it is not set
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        """ Register the signal handlers and checks """
+        from core import db, signals  # noqa: F401
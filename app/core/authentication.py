@@ -0,0 +1,121 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+from core.metrics import token_cache_lookups
+
+
+class TokenCache:
+    """ Process local LRU of authenticated tokens with a TTL, optionally
+    backed by a shared django cache so other processes can reuse
+    a lookup """
+
+    def __init__(self, max_size, ttl, alias=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.alias = alias
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        """ Return the shared cache tier, if one is configured """
+        return caches[self.alias] if self.alias else None
+
+    def _shared_key(self, key):
+        """ Shared cache key for a token, the token itself is hashed
+        so it never shows up in the cache backend """
+        return 'token-auth:' + hashlib.sha256(key.encode()).hexdigest()
+
+    def _store(self, key, token):
+        """ Store a token in the local tier, evicting the least
+        recently used entry when full """
+        with self._lock:
+            self._entries[key] = (token, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        """ Return the cached token for key or None """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                token, expires = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    token_cache_lookups.labels('local').inc()
+                    return token
+                del self._entries[key]
+
+        if self.shared is not None:
+            token = self.shared.get(self._shared_key(key))
+            if token is not None:
+                self._store(key, token)
+                self.hits += 1
+                token_cache_lookups.labels('shared').inc()
+                return token
+
+        self.misses += 1
+        token_cache_lookups.labels('miss').inc()
+        return None
+
+    def set(self, token):
+        """ Cache a token in every tier """
+        self._store(token.key, token)
+        if self.shared is not None:
+            self.shared.set(self._shared_key(token.key), token, self.ttl)
+
+    def delete(self, *keys):
+        """ Drop tokens from every tier """
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+        if self.shared is not None and keys:
+            self.shared.delete_many([self._shared_key(key) for key in keys])
+
+    def clear(self):
+        """ Drop every token from the local tier """
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(
+    max_size=settings.TOKEN_AUTH_CACHE_SIZE,
+    ttl=settings.TOKEN_AUTH_CACHE_TTL,
+    alias=settings.TOKEN_AUTH_CACHE_ALIAS,
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """ Token authentication that caches the token to user lookup.
+
+    Entries are invalidated by core.signals when a token is deleted or
+    its user is saved. The local tier of other processes can only be
+    invalidated by its TTL, so TOKEN_AUTH_CACHE_TTL bounds how long a
+    deactivated user may still authenticate there.
+    """
+
+    def authenticate_credentials(self, key):
+        """ Return a copy of the cached user and token, falling back to
+        the database on a miss. The cached objects are shared by the
+        threads of the process, and requests may change their user, as
+        profile updates do """
+        token = token_cache.get(key)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(token)
+
+        token = copy.copy(token)
+        token.user = copy.copy(token.user)
+        return (token.user, token)
@@ -0,0 +1,22 @@
+from django.db.backends.postgresql import base
+
+from core.db import check_connection
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """ PostgreSQL backend checking a kept connection before its first
+    cursor in a request rather than when the request starts, the way
+    Django 4.1's CONN_HEALTH_CHECKS does, so requests without queries
+    skip the check """
+    # Set by core.db.mark_kept_connections when a request starts
+    health_check_pending = False
+
+    def _cursor(self, name=None):
+        """ Check a kept connection first, dropping it if dead so a new
+        one is opened """
+        if self.health_check_pending:
+            self.health_check_pending = False
+            if self.connection is not None:
+                check_connection(self)
+
+        return super()._cursor(name)
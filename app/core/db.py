@@ -0,0 +1,146 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.checks import Warning, register
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from core.metrics import db_connections
+
+
+class ConnectionStats:
+    """ Process wide counters of database connection churn """
+    names = ('opened', 'reused', 'dropped')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """ Set every counter back to zero """
+        with self._lock:
+            self._counts = dict.fromkeys(self.names, 0)
+
+    def incr(self, name):
+        """ Add one to a counter """
+        with self._lock:
+            self._counts[name] += 1
+        db_connections.labels(name).inc()
+
+    def snapshot(self):
+        """ Return a copy of the counters """
+        with self._lock:
+            return dict(self._counts)
+
+
+connection_stats = ConnectionStats()
+
+
+@receiver(connection_created)
+def count_opened_connection(sender, connection, **kwargs):
+    """ Count every new database connection """
+    connection_stats.incr('opened')
+
+
+def check_connection(connection):
+    """ Drop a kept connection the server closed, before a query tries
+    to use it. Called by core.backends.postgresql on the first use of
+    the connection in a request """
+    if settings.DB_HEALTH_CHECKS and not connection.is_usable():
+        connection_stats.incr('dropped')
+        connection.close()
+    else:
+        connection_stats.incr('reused')
+
+
+def mark_kept_connections():
+    """ Have the connections the thread kept from its previous requests
+    checked on their first use """
+    for connection in connections.all():
+        if connection.connection is not None:
+            connection.health_check_pending = True
+
+
+@receiver(request_started)
+def mark_request_connections(sender, **kwargs):
+    """ Mark the kept connections of the thread starting a request. Runs
+    after Django's close_old_connections, so only connections within
+    CONN_MAX_AGE are left. Under ASGI this is the thread of sync views,
+    the read pool marking its own, see recipe.async_views """
+    mark_kept_connections()
+
+
+def close_pool_connections(executor, workers):
+    """ Close the connections kept by the threads of executor, which
+    must have exactly workers threads at most """
+    barrier = threading.Barrier(workers)
+
+    def close(_):
+        # Every worker blocks here so each one runs a task
+        barrier.wait()
+        connections.close_all()
+
+    list(executor.map(close, range(workers)))
+
+
+class WorkerPool:
+    """ Thread pool of the process created on first use. Each worker
+    holds at most one database connection, so the size, read from the
+    setting named size_setting, bounds the connections of the pool """
+
+    def __init__(self, size_setting, thread_name_prefix):
+        self.size_setting = size_setting
+        self.thread_name_prefix = thread_name_prefix
+        self.executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        """ Return the configured number of workers """
+        return getattr(settings, self.size_setting)
+
+    def get(self):
+        """ Return the executor, created on first use """
+        with self._lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=self.size,
+                    thread_name_prefix=self.thread_name_prefix,
+                )
+            return self.executor
+
+    def close_connections(self):
+        """ Close the database connections kept by the workers """
+        if self.executor is not None:
+            close_pool_connections(self.executor, self.size)
+
+
+def connection_budget():
+    """ Return the most connections the configured processes and their
+    threads may hold at once """
+    per_process = settings.WEB_THREADS + settings.ASYNC_READ_WORKERS + \
+        settings.RECIPE_IMAGE_WORKERS
+    return settings.WEB_CONCURRENCY * per_process * len(settings.DATABASES)
+
+
+@register()
+def check_connection_budget(app_configs, **kwargs):
+    """ Warn when the processes may open more connections than the
+    database allows them """
+    if settings.DB_MAX_CONNECTIONS is None:
+        return []
+
+    needed = connection_budget()
+    if needed <= settings.DB_MAX_CONNECTIONS:
+        return []
+
+    return [Warning(
+        f'{needed} database connections may be opened, but '
+        f'DB_MAX_CONNECTIONS is {settings.DB_MAX_CONNECTIONS}.',
+        hint='Lower WEB_CONCURRENCY, WEB_THREADS, ASYNC_READ_WORKERS or '
+             'RECIPE_IMAGE_WORKERS.',
+        id='core.W001',
+    )]
@@ -0,0 +1,271 @@
+import asyncio
+import contextvars
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# The profile of the request being handled, shared by the threads the
+# request runs on when they are started with a copy of the context
+current_profile = contextvars.ContextVar('current_profile', default=None)
+
+
+class RequestProfile:
+    """ Timings and queries of one request """
+
+    def __init__(self, track_statements=True):
+        self.started = time.perf_counter()
+        # Whether to count the queries by SQL, for sql_duplicates
+        self.track_statements = track_statements
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.statements = Counter()
+        self.timings = Counter()
+        self._running = set()
+
+    @property
+    def sql_duplicates(self):
+        """ Return the queries repeating the SQL of an earlier one, the
+        sign of a query run in a loop """
+        return sum(count - 1 for count in self.statements.values())
+
+    def most_repeated(self):
+        """ Return the most repeated SQL and its count, if any """
+        if not self.sql_duplicates:
+            return None, 0
+        return self.statements.most_common(1)[0]
+
+    def record_query(self, sql, duration):
+        """ Add an executed query """
+        self.sql_count += 1
+        self.sql_time += duration
+        if self.track_statements:
+            self.statements[sql] += 1
+
+    @contextmanager
+    def timed(self, name):
+        """ Add the time spent in the block to the timing name. Nested
+        blocks of the same name are only counted once """
+        if name in self._running:
+            yield
+            return
+
+        self._running.add(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += time.perf_counter() - start
+            self._running.discard(name)
+
+    def metrics(self):
+        """ Return the timings in milliseconds with the query counts """
+        metrics = {
+            'total_ms': (time.perf_counter() - self.started) * 1000,
+            'sql_count': self.sql_count,
+            'sql_ms': self.sql_time * 1000,
+            'sql_duplicates': self.sql_duplicates,
+        }
+        for name, seconds in self.timings.items():
+            metrics[f'{name}_ms'] = seconds * 1000
+
+        return metrics
+
+
+@contextmanager
+def timed(name):
+    """ Add the time spent in the block to the timing name of the
+    current request, if it is profiled """
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    with profile.timed(name):
+        yield
+
+
+def record_queries(execute, sql, params, many, context):
+    """ Database execute wrapper adding each query to the profile of
+    the current request """
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record_query(sql, time.perf_counter() - start)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    """ Record the queries of every connection """
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+def install_query_recorders():
+    """ Record the queries of the connections already opened """
+    for connection in connections.all():
+        install_query_recorder(None, connection)
+
+
+class TimedSerializerMixin:
+    """ Count the time spent serializing in the serialize timing """
+
+    def to_representation(self, instance):
+        """ Serialize instance, timed """
+        with timed('serialize'):
+            return super().to_representation(instance)
+
+
+def server_timing(metrics):
+    """ Return a Server-Timing header value for the metrics """
+    entries = [
+        f'db;dur={metrics["sql_ms"]:.1f};'
+        f'desc="{metrics["sql_count"]} queries, '
+        f'{metrics["sql_duplicates"]} duplicates"'
+    ]
+    for name in ('serialize', 'render'):
+        if f'{name}_ms' in metrics:
+            entries.append(f'{name};dur={metrics[f"{name}_ms"]:.1f}')
+    entries.append(f'total;dur={metrics["total_ms"]:.1f}')
+
+    return ', '.join(entries)
+
+
+class ProfilingMiddleware:
+    """ Base of the middleware timing requests with a RequestProfile.
+    Runs in the mode of the handler, so under ASGI requests are not
+    funneled through the thread of sync middleware. Subclasses return
+    the profile of a request from start(), or None to pass it through,
+    and handle the response in finish() """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Makes the handler await the instance, as MiddlewareMixin
+            # does
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+        install_query_recorders()
+
+    def use_profile(self, track_statements):
+        """ Return the profile of the request and the token resetting
+        it. The profile an outer middleware started is shared, if any """
+        profile = current_profile.get()
+        if profile is not None:
+            if track_statements:
+                profile.track_statements = True
+            return profile, None
+
+        profile = RequestProfile(track_statements=track_statements)
+        return profile, current_profile.set(profile)
+
+    def start(self, request):
+        raise NotImplementedError
+
+    def finish(self, request, response, profile):
+        raise NotImplementedError
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        started = self.start(request)
+        if started is None:
+            return self.get_response(request)
+
+        profile, token = started
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                current_profile.reset(token)
+
+        self.finish(request, response, profile)
+        return response
+
+    async def __acall__(self, request):
+        """ Profile the request under ASGI """
+        started = self.start(request)
+        if started is None:
+            return await self.get_response(request)
+
+        profile, token = started
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                current_profile.reset(token)
+
+        self.finish(request, response, profile)
+        return response
+
+
+class PerformanceMiddleware(ProfilingMiddleware):
+    """ Profile a sample of the requests, reporting their wall time,
+    queries, serializing and rendering time in a Server-Timing header
+    and a JSON log line. Goes first in MIDDLEWARE so its wall time
+    covers the other middleware and rendering """
+
+    def sampled(self):
+        """ Return whether to profile the current request """
+        return settings.PERF_SAMPLE_RATE > 0 and \
+            random.random() < settings.PERF_SAMPLE_RATE
+
+    def start(self, request):
+        """ Profile the sampled requests, tracking their SQL """
+        if not self.sampled():
+            return None
+        return self.use_profile(track_statements=True)
+
+    def finish(self, request, response, profile):
+        self.report(request, response, profile.metrics(), profile)
+
+    def process_template_response(self, request, response):
+        """ Time the rendering which follows, this being the last
+        template response hook to run """
+        profile = current_profile.get()
+        if profile is None:
+            return response
+
+        start = time.perf_counter()
+
+        def rendered(response):
+            profile.timings['render'] += time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def report(self, request, response, metrics, profile):
+        """ Add the Server-Timing header and log the metrics """
+        if settings.PERF_SERVER_TIMING:
+            response['Server-Timing'] = server_timing(metrics)
+
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **{name: round(value, 2) for name, value in metrics.items()},
+        }
+        sql, count = profile.most_repeated()
+        if count:
+            fields['most_repeated_sql'] = sql[:200]
+            fields['most_repeated_count'] = count
+
+        slow = metrics['total_ms'] >= settings.PERF_SLOW_REQUEST_MS
+        logger.log(logging.WARNING if slow else logging.INFO,
+                   json.dumps(fields), extra={'performance': fields})
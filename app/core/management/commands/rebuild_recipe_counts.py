@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Tag, Ingreedient, count_recipes, touch
+
+
+class Command(BaseCommand):
+    """ Django command to recompute the recipe_count of every tag and
+    ingreedient from the join tables """
+    help = 'Rebuild the recipe_count of tags and ingreedients'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of rows updated per transaction'
+        )
+
+    def handle(self, *args, **options):
+        """ Handling custom commands """
+        batch_size = options['batch_size']
+        for model in (Tag, Ingreedient):
+            pks = list(model.objects.order_by('pk').values_list(
+                'pk', flat=True
+            ))
+            for start in range(0, len(pks), batch_size):
+                with transaction.atomic():
+                    queryset = model.objects.filter(
+                        pk__in=pks[start:start + batch_size]
+                    )
+                    touch(queryset)
+                    count_recipes(queryset)
+
+            self.stdout.write(
+                f'Recounted {len(pks)} {model._meta.verbose_name_plural}'
+            )
@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.seed import SEED_PASSWORD, Seeder
+
+
+class Command(BaseCommand):
+    """ Django command to generate users with their tags, ingreedients
+    and recipes for staging and benchmarks """
+    help = 'Bulk create users with tags, ingreedients and linked recipes ' \
+           'from a seed, copying the rows a chunk at a time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--tags', type=int, default=20,
+                            help='Tags of each user')
+        parser.add_argument('--ingreedients', type=int, default=20,
+                            help='Ingreedients of each user')
+        parser.add_argument('--recipes', type=int, default=100,
+                            help='Recipes of each user')
+        parser.add_argument('--per-recipe', type=int, default=3,
+                            help='Tags and ingreedients of each recipe')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Seed of the generated data')
+        parser.add_argument('--prefix', default='seed',
+                            help='Prefix of the emails of the users')
+        parser.add_argument('--password', default=SEED_PASSWORD,
+                            help='Password of every user')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of rows copied at once'
+        )
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete the users of the prefix first')
+
+    def handle(self, *args, **options):
+        """ Handling custom commands """
+        seeder = Seeder(prefix=options['prefix'], seed=options['seed'],
+                        batch_size=options['batch_size'],
+                        password=options['password'])
+        if options['clear']:
+            seeder.clear()
+
+        start = time.perf_counter()
+        created = seeder.seed(options['users'], options['tags'],
+                              options['ingreedients'], options['recipes'],
+                              options['per_recipe'])
+        seconds = time.perf_counter() - start
+
+        rows = sum(created.values())
+        for kind, count in created.items():
+            self.stdout.write(f'Created {count} {kind}')
+        self.stdout.write(f'{rows} rows in {seconds:.1f}s, '
+                          f'{rows / seconds:.0f} rows/s')
@@ -1,21 +1,73 @@
+import random
 import time
-from django.db import connections
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 
 class Command(BaseCommand):
     """ Django command to pause execution until database is available """
+    help = 'Wait until the database accepts queries, with exponential ' \
+           'backoff, exiting with an error after the timeout'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Alias of the database to wait for'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=60,
+            help='Seconds to wait in total before failing'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0.1,
+            help='Seconds before the first retry, doubled after each one'
+        )
+        parser.add_argument(
+            '--max-interval',
+            type=float,
+            default=5,
+            help='Longest wait between two attempts'
+        )
+
+    def probe(self, alias):
+        """ Open a connection and run a query on it """
+        connection = connections[alias]
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
 
     def handle(self, *args, **options):
         """ Handling custom commands """
         self.stdout.write('Waiting for database...')
-        db_conn = None
-        while not db_conn:
+        deadline = time.monotonic() + options['timeout']
+        interval = options['interval']
+
+        while True:
             try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+                self.probe(options['database'])
+                break
+            except OperationalError as error:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f'Database unavailable after {options["timeout"]} '
+                        f'seconds: {error}'
+                    )
+
+                # Half the interval plus a random share of the other
+                # half, so restarting containers do not retry in step
+                delay = min(interval / 2 + random.uniform(0, interval / 2),
+                            remaining)
+                self.stdout.write(
+                    f'Database unavailable, waiting {delay:.2f} seconds...'
+                )
+                time.sleep(delay)
+                interval = min(interval * 2, options['max_interval'])
 
         self.stdout.write(self.style.SUCCESS('Database Available!'))
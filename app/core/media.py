@@ -0,0 +1,95 @@
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.conf.urls.static import static
+from django.core.exceptions import ImproperlyConfigured, \
+    SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, \
+    HttpResponseNotModified
+from django.urls import re_path
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+MEDIA_SERVE_MODES = ('static', 'file', 'x-accel', 'x-sendfile', 'none')
+
+
+def media_path(path):
+    """ Return the absolute path of a media file, or raise Http404 if
+    it is outside MEDIA_ROOT or not a file """
+    name = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404('Invalid media path')
+
+    if not os.path.isfile(full_path):
+        raise Http404('Media file not found')
+
+    return name, full_path
+
+
+def serve_media(request, path):
+    """ Serve a media file with the configured MEDIA_SERVE_MODE.
+
+    Uploaded file names are random, so the content behind a URL never
+    changes and it may be cached forever.
+    """
+    name, full_path = media_path(path)
+    mode = settings.MEDIA_SERVE_MODE
+    content_type, encoding = mimetypes.guess_type(full_path)
+
+    if mode == 'x-accel':
+        # nginx serves the file from an internal location
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = \
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(name)
+    elif mode == 'x-sendfile':
+        # Apache mod_xsendfile and lighttpd read the file themselves
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+    else:
+        stat = os.stat(full_path)
+        if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime,
+            stat.st_size
+        ):
+            return HttpResponseNotModified()
+
+        # FileResponse hands the open file to the server's
+        # wsgi.file_wrapper, which sends it with sendfile()
+        response = FileResponse(open(full_path, 'rb'),
+                                content_type=content_type)
+        response['Last-Modified'] = http_date(stat.st_mtime)
+
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Cache-Control'] = \
+        f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable'
+
+    return response
+
+
+def media_urlpatterns():
+    """ Return the URL patterns serving MEDIA_URL in MEDIA_SERVE_MODE """
+    mode = settings.MEDIA_SERVE_MODE
+    if mode not in MEDIA_SERVE_MODES:
+        raise ImproperlyConfigured(
+            f'MEDIA_SERVE_MODE must be one of {", ".join(MEDIA_SERVE_MODES)}'
+        )
+
+    if mode == 'static':
+        return static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+    if mode == 'none':
+        return []
+
+    prefix = re.escape(settings.MEDIA_URL.lstrip('/'))
+    return [
+        re_path(rf'^{prefix}(?P<path>.*)$', serve_media, name='media'),
+    ]
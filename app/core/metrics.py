@@ -0,0 +1,101 @@
+import hmac
+import os
+import time
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, \
+    HttpResponseNotFound
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, \
+    CollectorRegistry, Counter, Gauge, Histogram, generate_latest, \
+    multiprocess
+
+from core.instrumentation import ProfilingMiddleware
+
+# Each process writes its values to files in PROMETHEUS_MULTIPROC_DIR
+# when it is set, and the exporter adds up the files of every process,
+# so no process waits on another to record a value
+
+request_latency = Histogram(
+    'api_request_duration_seconds',
+    'Time to answer a request, by view and action',
+    ('view', 'method', 'status'),
+)
+db_queries = Counter(
+    'api_db_queries_total',
+    'Database queries run by requests, by view and action',
+    ('view',),
+)
+db_connections = Counter(
+    'api_db_connections_total',
+    'Database connections opened, reused by a request or dropped when '
+    'found unusable',
+    ('event',),
+)
+token_cache_lookups = Counter(
+    'api_token_cache_total',
+    'Token authentication cache lookups by result',
+    ('result',),
+)
+image_queue_depth = Gauge(
+    'recipe_image_queue_depth',
+    'Recipe images waiting for or having their derivatives generated',
+    multiprocess_mode='livesum',
+)
+
+
+def view_name(view_func, method):
+    """ Return a bounded label naming a view and its viewset action """
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__name__', 'unknown')
+
+    action = (getattr(view_func, 'actions', None) or {}).get(method.lower())
+    return f'{cls.__name__}.{action}' if action else cls.__name__
+
+
+def get_registry():
+    """ Return the registry holding the values of every process """
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    """ Export the metrics in the Prometheus text format to the bearer
+    of METRICS_TOKEN, the export being off while it is not set """
+    if not settings.METRICS_TOKEN:
+        return HttpResponseNotFound()
+
+    expected = f'Bearer {settings.METRICS_TOKEN}'
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not hmac.compare_digest(header, expected):
+        return HttpResponseForbidden()
+
+    return HttpResponse(generate_latest(get_registry()),
+                        content_type=CONTENT_TYPE_LATEST)
+
+
+class MetricsMiddleware(ProfilingMiddleware):
+    """ Record the latency and query count of every request by view.
+    Goes first in MIDDLEWARE. The profile it starts only counts queries
+    and is shared with PerformanceMiddleware, which tracks their SQL on
+    the requests it samples """
+
+    def start(self, request):
+        return self.use_profile(track_statements=False)
+
+    def finish(self, request, response, profile):
+        """ Record the latency and queries of the request under the view
+        it was routed to """
+        match = request.resolver_match
+        view = view_name(match.func, request.method) if match else \
+            'unresolved'
+        request_latency.labels(view, request.method,
+                               response.status_code).observe(
+            time.perf_counter() - profile.started
+        )
+        if profile.sql_count:
+            db_queries.labels(view).inc(profile.sql_count)
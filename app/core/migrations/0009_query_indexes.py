@@ -0,0 +1,36 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_recipe_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingreedient',
+            index=models.Index(fields=['user', 'name'], name='core_ingree_user_id_e16f08_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'id'], name='core_recipe_user_id_bf8313_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'name'], name='core_tag_user_id_74e398_idx'),
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX core_recipe_tags_tag_recipe_idx '
+            'ON core_recipe_tags (tag_id, recipe_id);',
+            reverse_sql='DROP INDEX core_recipe_tags_tag_recipe_idx;',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX core_recipe_ingreedient_ingreedient_recipe_idx '
+            'ON core_recipe_ingreedient (ingreedient_id, recipe_id);',
+            reverse_sql='DROP INDEX '
+                        'core_recipe_ingreedient_ingreedient_recipe_idx;',
+        ),
+    ]
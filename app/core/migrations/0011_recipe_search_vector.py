@@ -0,0 +1,134 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:09
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# The vector of a recipe, its title weighted above the names of its tags
+# and ingreedients
+SEARCH_VECTOR_FUNCTION = """
+CREATE FUNCTION core_recipe_search_vector(integer, text)
+RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('english', coalesce($2, '')), 'A')
+        || setweight(to_tsvector('english', coalesce((
+            SELECT string_agg(tag.name, ' ')
+            FROM core_tag tag
+            JOIN core_recipe_tags link ON link.tag_id = tag.id
+            WHERE link.recipe_id = $1
+        ), '')), 'B')
+        || setweight(to_tsvector('english', coalesce((
+            SELECT string_agg(ingreedient.name, ' ')
+            FROM core_ingreedient ingreedient
+            JOIN core_recipe_ingreedient link
+                ON link.ingreedient_id = ingreedient.id
+            WHERE link.recipe_id = $1
+        ), '')), 'B')
+$$ LANGUAGE sql STABLE;
+"""
+
+# Every write of a recipe row recomputes its vector, so the other
+# triggers only need to update the recipes concerned
+RECIPE_TRIGGER = """
+CREATE FUNCTION core_recipe_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := core_recipe_search_vector(NEW.id, NEW.title);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_recipe_search_vector_update
+BEFORE INSERT OR UPDATE ON core_recipe
+FOR EACH ROW EXECUTE PROCEDURE core_recipe_search_vector_update();
+"""
+
+# Statement level so a bulk insert of relations updates each recipe once
+RELATION_TRIGGERS = """
+CREATE FUNCTION core_recipe_relation_search_update() RETURNS trigger AS $$
+BEGIN
+    UPDATE core_recipe SET search_vector = NULL
+    WHERE id IN (SELECT DISTINCT recipe_id FROM changed);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+""" + ''.join(
+    f"""
+CREATE TRIGGER {table}_search_insert
+AFTER INSERT ON {table} REFERENCING NEW TABLE AS changed
+FOR EACH STATEMENT EXECUTE PROCEDURE core_recipe_relation_search_update();
+
+CREATE TRIGGER {table}_search_delete
+AFTER DELETE ON {table} REFERENCING OLD TABLE AS changed
+FOR EACH STATEMENT EXECUTE PROCEDURE core_recipe_relation_search_update();
+"""
+    for table in ('core_recipe_tags', 'core_recipe_ingreedient')
+)
+
+# Renaming a tag or an ingreedient changes the recipes using it
+RENAME_TRIGGERS = ''.join(
+    f"""
+CREATE FUNCTION {table}_search_update() RETURNS trigger AS $$
+BEGIN
+    UPDATE core_recipe SET search_vector = NULL
+    WHERE id IN (
+        SELECT recipe_id FROM {through} WHERE {column} = NEW.id
+    );
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER {table}_search_update
+AFTER UPDATE OF name ON {table}
+FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+EXECUTE PROCEDURE {table}_search_update();
+"""
+    for table, through, column in (
+        ('core_tag', 'core_recipe_tags', 'tag_id'),
+        ('core_ingreedient', 'core_recipe_ingreedient', 'ingreedient_id'),
+    )
+)
+
+DROP_TRIGGERS = """
+DROP TRIGGER core_tag_search_update ON core_tag;
+DROP FUNCTION core_tag_search_update();
+DROP TRIGGER core_ingreedient_search_update ON core_ingreedient;
+DROP FUNCTION core_ingreedient_search_update();
+DROP TRIGGER core_recipe_tags_search_insert ON core_recipe_tags;
+DROP TRIGGER core_recipe_tags_search_delete ON core_recipe_tags;
+DROP TRIGGER core_recipe_ingreedient_search_insert
+    ON core_recipe_ingreedient;
+DROP TRIGGER core_recipe_ingreedient_search_delete
+    ON core_recipe_ingreedient;
+DROP FUNCTION core_recipe_relation_search_update();
+DROP TRIGGER core_recipe_search_vector_update ON core_recipe;
+DROP FUNCTION core_recipe_search_vector_update();
+DROP FUNCTION core_recipe_search_vector(integer, text);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='core_recipe_search__c01407_gin'),
+        ),
+        migrations.RunSQL(
+            SEARCH_VECTOR_FUNCTION + RECIPE_TRIGGER + RELATION_TRIGGERS +
+            RENAME_TRIGGERS,
+            reverse_sql=DROP_TRIGGERS,
+        ),
+        # Fill in the existing recipes through the trigger
+        migrations.RunSQL(
+            'UPDATE core_recipe SET search_vector = NULL;',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
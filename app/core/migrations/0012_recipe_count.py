@@ -0,0 +1,44 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingreedient',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='ingreedient',
+            index=models.Index(fields=['user', 'recipe_count'], name='core_ingree_user_id_01a328_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'recipe_count'], name='core_tag_user_id_699afc_idx'),
+        ),
+        migrations.RunSQL(
+            'UPDATE core_tag SET recipe_count = ('
+            'SELECT count(*) FROM core_recipe_tags '
+            'WHERE core_recipe_tags.tag_id = core_tag.id);',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            'UPDATE core_ingreedient SET recipe_count = ('
+            'SELECT count(*) FROM core_recipe_ingreedient '
+            'WHERE core_recipe_ingreedient.ingreedient_id = '
+            'core_ingreedient.id);',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+# Only writes of the title or of the vector, which the relation and
+# rename triggers set to NULL, recompute it: touch() and other updates
+# of the remaining columns leave it as it is
+RECIPE_TRIGGER = """
+DROP TRIGGER core_recipe_search_vector_update ON core_recipe;
+
+CREATE TRIGGER core_recipe_search_vector_update
+BEFORE INSERT OR UPDATE OF title, search_vector ON core_recipe
+FOR EACH ROW EXECUTE PROCEDURE core_recipe_search_vector_update();
+"""
+
+PREVIOUS_RECIPE_TRIGGER = """
+DROP TRIGGER core_recipe_search_vector_update ON core_recipe;
+
+CREATE TRIGGER core_recipe_search_vector_update
+BEFORE INSERT OR UPDATE ON core_recipe
+FOR EACH ROW EXECUTE PROCEDURE core_recipe_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_recipe_image_variant_keys'),
+    ]
+
+    operations = [
+        migrations.RunSQL(RECIPE_TRIGGER,
+                          reverse_sql=PREVIOUS_RECIPE_TRIGGER),
+    ]
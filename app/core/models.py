@@ -1,9 +1,13 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 import uuid
 import os
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
     PermissionsMixin
 from django.conf import settings
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 
 def recipe_image_file_path(instance, file_name):
@@ -14,6 +18,31 @@ def recipe_image_file_path(instance, file_name):
     return os.path.join('upload/recipe', filename)
 
 
+# Text search configuration of Recipe.search_vector
+SEARCH_CONFIG = 'english'
+
+
+def touch(queryset):
+    """ Set the modification time of the objects to now """
+    now = timezone.now()
+    queryset.update(updated_at=now)
+
+    return now
+
+
+def count_recipes(queryset):
+    """ Recompute the recipe_count of the tags or ingreedients in
+    queryset from the join table """
+    relation = queryset.model._meta.get_field('recipe')
+    column = relation.field.m2m_reverse_field_name()
+    counts = relation.through.objects.filter(
+        **{column: models.OuterRef('pk')}
+    ).values(column).annotate(count=models.Count('pk')).values('count')
+    queryset.update(
+        recipe_count=Coalesce(models.Subquery(counts), 0)
+    )
+
+
 class CustomUserManager(BaseUserManager):
 
     def create_user(self, email, password=None, **extra_fields):
@@ -56,6 +85,15 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    # Number of recipes using it, maintained by core.signals
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name']),
+            models.Index(fields=['user', 'recipe_count']),
+        ]
 
     def __str__(self):
         return self.name
@@ -68,6 +106,15 @@ class Ingreedient(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    # Number of recipes using it, maintained by core.signals
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name']),
+            models.Index(fields=['user', 'recipe_count']),
+        ]
 
     def __str__(self):
         return self.name
@@ -86,6 +133,18 @@ class Recipe(models.Model):
     ingreedient = models.ManyToManyField('Ingreedient')
     tags = models.ManyToManyField('Tag')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    # Keys of the derivatives of image written so far, see recipe.images
+    image_variant_keys = models.JSONField(default=list, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Title, tag names and ingreedient names, maintained by the database
+    # triggers of migration 0011
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id']),
+            GinIndex(fields=['search_vector']),
+        ]
 
     def __str__(self):
         return self.title
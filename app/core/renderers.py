@@ -0,0 +1,71 @@
+from django.conf import settings
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME |
+    orjson.OPT_PASSTHROUGH_SUBCLASS
+) if orjson is not None else 0
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """ JSON renderer using orjson when it is installed, with the same
+    output as JSONRenderer. Indented output, ASCII only output and data
+    orjson can not encode fall back to JSONRenderer """
+    encoder = encoders.JSONEncoder()
+
+    def default(self, obj):
+        """ Encode the types orjson leaves to us like JSONRenderer
+        does, so datetimes end in Z as in the rest of the API """
+        return self.encoder.default(obj)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """ Render data into JSON, returning a bytestring """
+        if orjson is None or data is None or self.ensure_ascii or \
+                not self.compact or \
+                self.get_indent(accepted_media_type,
+                                renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.default,
+                               option=JSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+
+        # Escaped like JSONRenderer does, so the output stays a strict
+        # javascript subset
+        return ret.replace('\u2028'.encode(), b'\\u2028') \
+            .replace('\u2029'.encode(), b'\\u2029')
+
+
+class FastJSONParser(JSONParser):
+    """ JSON parser using orjson when it is installed. orjson rejects
+    NaN and Infinity, so a parser which allows them falls back to
+    JSONParser """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """ Parse the request body as JSON """
+        if orjson is None or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        try:
+            body = stream.read()
+            if encoding.lower().replace('-', '') != 'utf8':
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except (ValueError, LookupError) as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,245 @@
+import io
+import itertools
+import random
+import re
+from collections import Counter
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from core.models import Tag, Ingreedient, Recipe, count_recipes
+from core.utils import chunks
+
+SEED_PASSWORD = 'seedpass'
+
+WORDS = (
+    'apple', 'basil', 'butter', 'chicken', 'chili', 'coconut', 'curry',
+    'garlic', 'ginger', 'honey', 'lemon', 'lentil', 'mango', 'mushroom',
+    'noodle', 'onion', 'pepper', 'potato', 'rice', 'salmon', 'spinach',
+    'tomato', 'vanilla', 'yogurt',
+)
+
+
+def copy_value(value):
+    """ Return value in the text format of COPY """
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t') \
+        .replace('\n', '\\n').replace('\r', '\\r')
+
+
+def reserve_ids(model, count):
+    """ Take count ids from the sequence of model's primary key, for
+    rows copied with their id """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(pg_get_serial_sequence(%s, %s)) '
+            'FROM generate_series(1, %s)',
+            [model._meta.db_table, model._meta.pk.column, count]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def copy_rows(model, fields, rows):
+    """ Insert the rows of values of fields in model's table with one
+    COPY and return their number """
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(name).column)
+                        for name in fields)
+    data = io.StringIO()
+    count = 0
+    for row in rows:
+        data.write('\t'.join(map(copy_value, row)) + '\n')
+        count += 1
+    data.seek(0)
+
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN',
+            data
+        )
+    return count
+
+
+class Seeder:
+    """ Bulk create users with their tags, ingreedients and recipes, a
+    chunk at a time so memory stays flat however many are created.
+    Users and tokens are bulk created, every user sharing one password
+    hash computed once, and the other rows are copied. Each user's data
+    comes from the seed and their index alone, so the same seed
+    generates the same data whatever the batch size """
+
+    def __init__(self, prefix='seed', seed=0, batch_size=5000,
+                 password=SEED_PASSWORD):
+        self.prefix = prefix
+        self.random_seed = seed
+        self.batch_size = batch_size
+        self.password = password
+        self.password_hash = make_password(password)
+
+    def email(self, index):
+        """ Return the email of the index-th seeded user """
+        return f'{self.prefix}-{index}@recipe.local'
+
+    def random(self, index):
+        """ Return the generator of the index-th user's data """
+        return random.Random(f'{self.random_seed}-{index}')
+
+    def seeded_users(self):
+        """ Return the users created by a seeder of the same prefix, not
+        those of a longer prefix starting with it """
+        return get_user_model().objects.filter(
+            email__regex=rf'^{re.escape(self.prefix)}-\d+@recipe\.local$'
+        )
+
+    def clear(self):
+        """ Delete the users of the prefix with all their data. Their
+        recipes, links, tags and ingreedients go with a statement per
+        table and chunk of users, rather than through the delete
+        signals, which load each row """
+        quote = connection.ops.quote_name
+        statements = [
+            f'DELETE FROM {quote(Recipe._meta.db_table)} '
+            f'WHERE user_id = ANY(%s)',
+        ]
+        for model, through in ((Tag, Recipe.tags.through),
+                               (Ingreedient, Recipe.ingreedient.through)):
+            column = through._meta.get_field(model._meta.model_name).column
+            statements.append(
+                f'DELETE FROM {quote(through._meta.db_table)} '
+                f'WHERE {quote(column)} IN (SELECT id FROM '
+                f'{quote(model._meta.db_table)} WHERE user_id = ANY(%s))'
+            )
+            statements.append(f'DELETE FROM {quote(model._meta.db_table)} '
+                              f'WHERE user_id = ANY(%s)')
+
+        users = self.seeded_users().values_list('id', flat=True)
+        while True:
+            chunk = list(users[:self.batch_size])
+            if not chunk:
+                return
+            # The recipes go first: the link triggers then find no
+            # recipe search vector to update
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for sql in statements:
+                        cursor.execute(sql, [chunk])
+                # Invalidates the cached tokens
+                get_user_model().objects.filter(id__in=chunk).delete()
+
+    def users(self, indexes):
+        """ Create the users of indexes with a token each and return
+        them """
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(email=self.email(i), name=f'User {i}',
+                             password=self.password_hash)
+            for i in indexes
+        )
+        Token.objects.bulk_create(self.token(user) for user in users)
+        return users
+
+    def token(self, user):
+        """ Return an unsaved token of user, bulk_create skipping the
+        save which generates the key """
+        token = Token(user=user)
+        token.key = token.generate_key()
+        return token
+
+    def names(self, model, users, count):
+        """ Copy count tags or ingreedients per user and return their
+        ids by user id """
+        label = model._meta.verbose_name.title()
+        ids = iter(reserve_ids(model, len(users) * count))
+        by_user = {user.id: list(itertools.islice(ids, count))
+                   for user in users}
+        now = timezone.now()
+        copy_rows(model, ('id', 'user', 'name', 'recipe_count', 'updated_at'),
+                  ((target_id, user_id, f'{label} {i}', 0, now)
+                   for user_id, target_ids in by_user.items()
+                   for i, target_id in enumerate(target_ids)))
+
+        return by_user
+
+    def recipe_values(self, users, generators, count, tags, ingreedients,
+                      per_recipe):
+        """ Yield the values of count random recipes per user, with the
+        ids of per_recipe of the user's tags and of their ingreedients """
+        for user, generator in zip(users, generators):
+            user_tags = tags.get(user.id, [])
+            user_ingreedients = ingreedients.get(user.id, [])
+            for _ in range(count):
+                yield (
+                    user.id,
+                    ' '.join(generator.sample(WORDS, 3)).capitalize(),
+                    generator.randint(5, 120),
+                    Decimal(generator.randint(100, 5000)) / 100,
+                    generator.sample(user_tags,
+                                     min(per_recipe, len(user_tags))),
+                    generator.sample(user_ingreedients,
+                                     min(per_recipe, len(user_ingreedients))),
+                )
+
+    def recipes(self, values):
+        """ Copy the recipes of values with their links a chunk at a time
+        and return the numbers of recipes and links. Runs in a
+        transaction: the links are copied before their recipes, the
+        foreign keys being checked on commit, so the link triggers find
+        no recipe to update and each search vector is computed once,
+        when its recipe is inserted """
+        recipes = links = 0
+        now = timezone.now()
+        for chunk in chunks(values, self.batch_size):
+            ids = reserve_ids(Recipe, len(chunk))
+            links += copy_rows(Recipe.tags.through, ('recipe', 'tag'), (
+                (recipe_id, tag_id)
+                for recipe_id, recipe in zip(ids, chunk)
+                for tag_id in recipe[4]
+            ))
+            links += copy_rows(
+                Recipe.ingreedient.through, ('recipe', 'ingreedient'), (
+                    (recipe_id, ingreedient_id)
+                    for recipe_id, recipe in zip(ids, chunk)
+                    for ingreedient_id in recipe[5]
+                )
+            )
+            recipes += copy_rows(
+                Recipe, ('id', 'user', 'title', 'time_miniutes', 'price',
+                         'link', 'image_variant_keys', 'updated_at'),
+                ((recipe_id, *recipe[:4], '', '[]', now)
+                 for recipe_id, recipe in zip(ids, chunk))
+            )
+
+        return recipes, links
+
+    def seed(self, users, tags, ingreedients, recipes, per_recipe):
+        """ Create users with their data, in a transaction per chunk of
+        users, and return the number of rows created by kind """
+        created = Counter()
+        per_user = max(tags, ingreedients, recipes, 1)
+        for indexes in chunks(range(users),
+                              max(self.batch_size // per_user, 1)):
+            with transaction.atomic():
+                generators = [self.random(i) for i in indexes]
+                chunk = self.users(indexes)
+                tag_ids = self.names(Tag, chunk, tags)
+                ingreedient_ids = self.names(Ingreedient, chunk, ingreedients)
+                recipe_count, link_count = self.recipes(self.recipe_values(
+                    chunk, generators, recipes, tag_ids, ingreedient_ids,
+                    per_recipe
+                ))
+                count_recipes(Tag.objects.filter(user__in=chunk))
+                count_recipes(Ingreedient.objects.filter(user__in=chunk))
+
+            created.update({
+                'users': len(chunk),
+                'tags': len(chunk) * tags,
+                'ingreedients': len(chunk) * ingreedients,
+                'recipes': recipe_count,
+                'links': link_count,
+            })
+
+        return created
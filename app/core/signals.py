@@ -0,0 +1,132 @@
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save, \
+    pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.authentication import token_cache
+from core.models import Tag, Ingreedient, Recipe, count_recipes, touch
+
+
+# Set while a bulk delete touches and recounts the objects linked to
+# the deleted ones itself, with a statement per relation
+bulk_deleting = contextvars.ContextVar('bulk_deleting', default=False)
+
+
+@contextmanager
+def deleting_in_bulk():
+    """ Skip the per object delete handlers of recipes, tags and
+    ingreedients, the caller doing their work for every deleted object
+    at once """
+    token = bulk_deleting.set(True)
+    try:
+        yield
+    finally:
+        bulk_deleting.reset(token)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """ Stop authenticating a deleted token from the cache """
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_token(sender, instance, created, **kwargs):
+    """ Drop a user's cached token whenever the user changes, this
+    covers deactivation and password changes as well as keeping
+    request.user current """
+    if created:
+        return
+
+    keys = Token.objects.filter(user=instance).values_list('key', flat=True)
+    token_cache.delete(*keys)
+
+
+def linked_pks(sender, instance, reverse):
+    """ Return the pks linked to instance through the join table """
+    relation = next(
+        field for field in Recipe._meta.many_to_many
+        if field.remote_field.through is sender
+    )
+    source = relation.m2m_field_name()
+    target = relation.m2m_reverse_field_name()
+    if reverse:
+        source, target = target, source
+
+    return set(sender.objects.filter(
+        **{source: instance}
+    ).values_list(target + '_id', flat=True))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingreedient.through)
+def touch_relation(sender, instance, action, reverse, model, pk_set,
+                   **kwargs):
+    """ Mark both sides of a changed recipe relation as modified and
+    recount the recipes of the tags or ingreedients involved """
+    if action == 'pre_clear':
+        # The cleared rows are gone by post_clear
+        instance._cleared_pks = linked_pks(sender, instance, reverse)
+        return
+
+    if action == 'post_clear':
+        pk_set = instance.__dict__.pop('_cleared_pks', None)
+    elif action not in ('post_add', 'post_remove'):
+        return
+
+    instance.updated_at = touch(
+        type(instance).objects.filter(pk=instance.pk)
+    )
+    if pk_set:
+        touch(model.objects.filter(pk__in=pk_set))
+
+    if reverse:
+        count_recipes(type(instance).objects.filter(pk=instance.pk))
+    elif pk_set:
+        count_recipes(model.objects.filter(pk__in=pk_set))
+
+
+@receiver(pre_delete, sender=Recipe)
+def collect_recipe_relations(sender, instance, **kwargs):
+    """ Remember the tags and ingreedients of a recipe being deleted,
+    its join table rows are deleted without m2m_changed """
+    if bulk_deleting.get():
+        return
+
+    instance._related_pks = {
+        field.related_model: linked_pks(field.remote_field.through,
+                                        instance, False)
+        for field in Recipe._meta.many_to_many
+    }
+
+
+@receiver(post_delete, sender=Recipe)
+def recount_recipe_relations(sender, instance, **kwargs):
+    """ Recount the tags and ingreedients of a deleted recipe """
+    for model, pks in instance.__dict__.pop('_related_pks', {}).items():
+        if pks:
+            queryset = model.objects.filter(pk__in=pks)
+            touch(queryset)
+            count_recipes(queryset)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def touch_tagged_recipes(sender, instance, created=False, **kwargs):
+    """ Mark the recipes showing a renamed or deleted tag as
+    modified """
+    if not created and not bulk_deleting.get():
+        touch(Recipe.objects.filter(tags=instance))
+
+
+@receiver(post_save, sender=Ingreedient)
+@receiver(pre_delete, sender=Ingreedient)
+def touch_recipes_using(sender, instance, created=False, **kwargs):
+    """ Mark the recipes showing a renamed or deleted ingreedient as
+    modified """
+    if not created and not bulk_deleting.get():
+        touch(Recipe.objects.filter(ingreedient=instance))
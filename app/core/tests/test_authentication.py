@@ -0,0 +1,122 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.authentication import CachedTokenAuthentication, TokenCache, \
+    token_cache
+
+
+class CachedTokenAuthenticationTests(TestCase):
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'token@theesh.com',
+            'testpass'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_authenticate_cached(self):
+        """ Test a token is only looked up once """
+        user, token = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user, self.user)
+
+        with self.assertNumQueries(0):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user, self.user)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_authenticate_returns_copies(self):
+        """ Test changing the authenticated user leaves the cached one
+        as it was """
+        user, token = self.auth.authenticate_credentials(self.token.key)
+        user.name = 'Changed'
+
+        user, token = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user.name, '')
+        self.assertIs(token.user, user)
+        self.assertIsNot(user, token_cache.get(self.token.key).user)
+
+    def test_authenticate_invalid_token(self):
+        """ Test an unknown token is rejected and not cached """
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials('invalid')
+        self.assertIsNone(token_cache.get('invalid'))
+
+    def test_deleted_token_invalidated(self):
+        """ Test a deleted token stops authenticating """
+        self.auth.authenticate_credentials(self.token.key)
+        self.token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_deactivated_user_invalidated(self):
+        """ Test the token of a deactivated user stops authenticating """
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_password_change_invalidated(self):
+        """ Test changing the password reloads the cached user """
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.set_password('newpass123')
+        self.user.save()
+
+        user, token = self.auth.authenticate_credentials(self.token.key)
+        self.assertTrue(user.check_password('newpass123'))
+
+
+class TokenCacheTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'cache@theesh.com',
+            'testpass'
+        )
+
+    def make_token(self, key):
+        """ Build an unsaved token for the test user """
+        return Token(key=key, user=self.user)
+
+    def test_least_recently_used_evicted(self):
+        """ Test the cache keeps at most max_size tokens """
+        cache = TokenCache(max_size=2, ttl=60)
+        cache.set(self.make_token('a'))
+        cache.set(self.make_token('b'))
+        cache.get('a')
+        cache.set(self.make_token('c'))
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    @patch('core.authentication.time.monotonic')
+    def test_entries_expire(self, monotonic):
+        """ Test tokens are dropped after the TTL """
+        monotonic.return_value = 100
+        cache = TokenCache(max_size=2, ttl=60)
+        cache.set(self.make_token('a'))
+
+        monotonic.return_value = 159
+        self.assertIsNotNone(cache.get('a'))
+        monotonic.return_value = 161
+        self.assertIsNone(cache.get('a'))
+
+    def test_shared_tier(self):
+        """ Test a token cached by another process is reused """
+        other = TokenCache(max_size=2, ttl=60, alias='default')
+        other.set(self.make_token('shared'))
+        cache = TokenCache(max_size=2, ttl=60, alias='default')
+
+        self.assertEqual(cache.get('shared').user, self.user)
+        cache.delete('shared')
+        self.assertIsNone(other.shared.get(other._shared_key('shared')))
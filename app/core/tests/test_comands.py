@@ -1,23 +1,84 @@
+from io import StringIO
 from unittest.mock import patch
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 from django.test import TestCase
 
+from core.models import Tag, Recipe
+
+PROBE = 'core.management.commands.wait_for_db.Command.probe'
+
 
 class CommandTest(TestCase):
 
     def test_wait_for_db_ready(self):
         """ Test waiting for db when db is available"""
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 1)
+        out = StringIO()
+        call_command('wait_for_db', stdout=out)
+
+        self.assertIn('Database Available!', out.getvalue())
 
     @patch('time.sleep', return_value=True)
     def test_wait_for_db(self, ts):
         """ Test wating for db """
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 5 + [True]
-            call_command("wait_for_db")
-            self.assertEqual(gi.call_count, 6)
+        with patch(PROBE) as probe:
+            probe.side_effect = [OperationalError] * 5 + [None]
+            call_command('wait_for_db', stdout=StringIO())
+            self.assertEqual(probe.call_count, 6)
+
+        delays = [call.args[0] for call in ts.call_args_list]
+        self.assertEqual(len(delays), 5)
+        for attempt, delay in enumerate(delays):
+            interval = min(0.1 * 2 ** attempt, 5)
+            self.assertGreaterEqual(delay, interval / 2)
+            self.assertLessEqual(delay, interval)
+
+    def test_wait_for_db_probes_connection(self):
+        """ Test a failure to connect is retried """
+        out = StringIO()
+        with patch('django.db.backends.base.base.BaseDatabaseWrapper.'
+                   'ensure_connection') as ensure_connection, \
+                patch('time.sleep') as sleep:
+            ensure_connection.side_effect = [OperationalError, None, None]
+            call_command('wait_for_db', stdout=out)
+
+        self.assertEqual(sleep.call_count, 1)
+        self.assertIn('Database Available!', out.getvalue())
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_timeout(self, ts):
+        """ Test an error is raised once the timeout is reached """
+        with patch(PROBE, side_effect=OperationalError('refused')):
+            with self.assertRaisesMessage(CommandError, 'refused'):
+                call_command('wait_for_db', timeout=0, stdout=StringIO())
+
+    def test_rebuild_recipe_counts(self):
+        """ Test recipe counts are recomputed from the join tables """
+        user = get_user_model().objects.create_user('count@theesh.com')
+        tag = Tag.objects.create(user=user, name='Vegan')
+        recipe = Recipe.objects.create(user=user, title='Curry',
+                                       time_miniutes=5, price=5.00)
+        recipe.tags.add(tag)
+        Tag.objects.update(recipe_count=7)
+
+        call_command('rebuild_recipe_counts', stdout=StringIO())
+
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 1)
+
+    def test_seed_data(self):
+        """ Test users are seeded with their data and cleared first """
+        out = StringIO()
+        call_command('seed_data', users=2, tags=2, ingreedients=1,
+                     recipes=3, per_recipe=1, prefix='command', stdout=out)
+        call_command('seed_data', users=1, tags=2, ingreedients=1,
+                     recipes=3, per_recipe=1, prefix='command', clear=True,
+                     stdout=out)
+
+        self.assertEqual(get_user_model().objects.count(), 1)
+        self.assertEqual(Recipe.objects.count(), 3)
+        self.assertEqual(Recipe.tags.through.objects.count(), 3)
+        self.assertIn('Created 3 recipes', out.getvalue())
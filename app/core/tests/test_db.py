@@ -0,0 +1,99 @@
+from unittest.mock import patch
+
+from django.core.signals import request_started
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core import db
+
+
+class ConnectionHealthTest(TestCase):
+    """ Test the persistent connection checks and counters """
+
+    def setUp(self):
+        db.connection_stats.reset()
+        self.conn = connections.create_connection('default')
+        self.conn.ensure_connection()
+        db.connection_stats.reset()
+        self.addCleanup(self.conn.close)
+
+    def start_request(self):
+        """ Send request_started with the test connection kept """
+        with patch.object(db.connections, 'all', return_value=[self.conn]):
+            request_started.send(sender=self.__class__)
+
+    def query(self):
+        """ Run a query on the test connection """
+        with self.conn.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    def test_checked_on_first_use(self):
+        """ Test a kept connection is checked on its first query of the
+        request only """
+        with patch.object(self.conn, 'is_usable',
+                          wraps=self.conn.is_usable) as is_usable:
+            self.start_request()
+            is_usable.assert_not_called()
+
+            self.query()
+            self.query()
+
+        is_usable.assert_called_once_with()
+        self.assertEqual(db.connection_stats.snapshot(),
+                         {'opened': 0, 'reused': 1, 'dropped': 0})
+
+    def test_unused_not_checked(self):
+        """ Test requests without queries skip the check """
+        with patch.object(self.conn, 'is_usable') as is_usable:
+            self.start_request()
+
+        is_usable.assert_not_called()
+        self.assertEqual(db.connection_stats.snapshot()['reused'], 0)
+
+    def test_dead_connection_dropped(self):
+        """ Test a connection the server closed is replaced before its
+        first query """
+        self.conn.connection.close()
+
+        self.start_request()
+        self.query()
+
+        self.assertEqual(db.connection_stats.snapshot(),
+                         {'opened': 1, 'reused': 0, 'dropped': 1})
+
+    @override_settings(DB_HEALTH_CHECKS=False)
+    def test_health_checks_disabled(self):
+        """ Test connections are reused unchecked when disabled """
+        with patch.object(self.conn, 'is_usable') as is_usable:
+            self.start_request()
+            self.query()
+
+        is_usable.assert_not_called()
+        self.assertEqual(db.connection_stats.snapshot()['reused'], 1)
+
+    def test_opened_connections_counted(self):
+        """ Test new connections are counted """
+        db.count_opened_connection(sender=None, connection=connection)
+
+        self.assertEqual(db.connection_stats.snapshot()['opened'], 1)
+
+
+class ConnectionBudgetCheckTest(SimpleTestCase):
+    """ Test the connection budget system check """
+
+    @override_settings(WEB_CONCURRENCY=4, WEB_THREADS=8,
+                       ASYNC_READ_WORKERS=8, RECIPE_IMAGE_WORKERS=2,
+                       DB_MAX_CONNECTIONS=50)
+    def test_budget_exceeded(self):
+        """ Test a warning is given when processes need too many """
+        errors = db.check_connection_budget(None)
+
+        self.assertEqual([error.id for error in errors], ['core.W001'])
+        self.assertIn('72', errors[0].msg)
+
+    @override_settings(WEB_CONCURRENCY=2, WEB_THREADS=4,
+                       ASYNC_READ_WORKERS=4, RECIPE_IMAGE_WORKERS=2,
+                       DB_MAX_CONNECTIONS=100)
+    def test_budget_respected(self):
+        """ Test no warning is given within the budget """
+        self.assertEqual(db.check_connection_budget(None), [])
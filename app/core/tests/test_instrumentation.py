@@ -0,0 +1,155 @@
+import asyncio
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, \
+    override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.instrumentation import PerformanceMiddleware, RequestProfile, \
+    current_profile, timed
+from core.models import Recipe, Tag
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+class RequestProfileTests(TestCase):
+    """ Test the request profile """
+
+    def test_duplicate_queries(self):
+        """ Test repeated SQL is counted as duplicates """
+        profile = RequestProfile()
+        profile.record_query('SELECT 1', 0.1)
+        profile.record_query('SELECT 2', 0.1)
+        profile.record_query('SELECT 2', 0.1)
+        profile.record_query('SELECT 2', 0.1)
+
+        self.assertEqual(profile.sql_count, 4)
+        self.assertEqual(profile.sql_duplicates, 2)
+        self.assertEqual(profile.most_repeated(), ('SELECT 2', 3))
+
+    def test_nested_timings_counted_once(self):
+        """ Test a block timed inside one of the same name adds nothing """
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        try:
+            with timed('serialize'):
+                with timed('serialize'):
+                    pass
+        finally:
+            current_profile.reset(token)
+
+        self.assertEqual(list(profile.timings), ['serialize'])
+
+    def test_timed_without_profile(self):
+        """ Test timing outside a profiled request does nothing """
+        with timed('serialize'):
+            pass
+
+        self.assertIsNone(current_profile.get())
+
+
+@override_settings(PERF_SAMPLE_RATE=1, PERF_SERVER_TIMING=True)
+class PerformanceMiddlewareTests(TestCase):
+    """ Test the request profiling middleware """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'perf@theesh.com',
+            'testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        recipe = Recipe.objects.create(user=self.user, title='Curry',
+                                       time_miniutes=5, price=5.00)
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe.tags.add(self.tag)
+
+    def get_metrics(self, **settings):
+        with override_settings(**settings), \
+                self.assertLogs('core.instrumentation') as logs:
+            res = self.client.get(RECIPE_URL, {'tags': self.tag.id})
+
+        return res, logs.records[0]
+
+    def test_server_timing(self):
+        """ Test the timings are returned in a Server-Timing header """
+        res, record = self.get_metrics()
+
+        timing = res['Server-Timing']
+        for name in ('db;dur=', 'serialize;dur=', 'render;dur=',
+                     'total;dur='):
+            self.assertIn(name, timing)
+        queries = record.performance['sql_count']
+        self.assertGreater(queries, 0)
+        self.assertIn(f'{queries} queries', timing)
+
+    def test_structured_log(self):
+        """ Test the metrics are logged as JSON """
+        res, record = self.get_metrics(PERF_SERVER_TIMING=False)
+
+        fields = json.loads(record.getMessage())
+        self.assertEqual(fields['path'], RECIPE_URL)
+        self.assertEqual(fields['status'], 200)
+        for name in ('total_ms', 'sql_ms', 'sql_duplicates',
+                     'serialize_ms', 'render_ms'):
+            self.assertIn(name, fields)
+        self.assertEqual(record.levelname, 'INFO')
+        self.assertNotIn('Server-Timing', res)
+
+    def test_slow_request_warning(self):
+        """ Test requests slower than the threshold log a warning """
+        res, record = self.get_metrics(PERF_SLOW_REQUEST_MS=0)
+
+        self.assertEqual(record.levelname, 'WARNING')
+
+    @override_settings(PERF_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        """ Test requests left out of the sample are not profiled """
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn('Server-Timing', res)
+
+
+@override_settings(PERF_SAMPLE_RATE=1, PERF_SERVER_TIMING=True)
+class AsyncPerformanceMiddlewareTests(SimpleTestCase):
+    """ Test the request profiling middleware under ASGI """
+
+    def setUp(self):
+        self.profiles = []
+
+        async def view(request):
+            self.profiles.append(current_profile.get())
+            await asyncio.sleep(0.3)
+            return HttpResponse()
+
+        self.middleware = PerformanceMiddleware(view)
+        self.factory = RequestFactory()
+
+    def test_async_profiled(self):
+        """ Test the middleware is awaited and profiles the request """
+        self.assertTrue(asyncio.iscoroutinefunction(self.middleware))
+
+        with self.assertLogs('core.instrumentation'):
+            res = asyncio.run(self.middleware(self.factory.get('/')))
+
+        self.assertIn('total;dur=', res['Server-Timing'])
+        self.assertIsInstance(self.profiles[0], RequestProfile)
+
+    @override_settings(PERF_SAMPLE_RATE=0)
+    def test_async_requests_concurrent(self):
+        """ Test requests through the middleware run concurrently """
+        async def requests():
+            await asyncio.gather(*(
+                self.middleware(self.factory.get('/')) for _ in range(5)
+            ))
+
+        start = time.perf_counter()
+        asyncio.run(requests())
+
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(self.profiles, [None] * 5)
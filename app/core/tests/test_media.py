@@ -0,0 +1,64 @@
+import os
+import tempfile
+
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.media import serve_media
+
+
+class ServeMediaTest(TestCase):
+    """ Test serving uploaded media """
+
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        os.makedirs(os.path.join(self.media_root.name, 'upload/recipe'))
+        self.name = 'upload/recipe/photo.jpg'
+        with open(os.path.join(self.media_root.name, self.name), 'wb') as f:
+            f.write(b'image')
+        self.factory = RequestFactory()
+
+    def serve(self, mode, path=None, **headers):
+        """ Serve path, the sample image by default, in mode """
+        request = self.factory.get('/media/', **headers)
+        with override_settings(MEDIA_ROOT=self.media_root.name,
+                               MEDIA_SERVE_MODE=mode):
+            return serve_media(request, path or self.name)
+
+    def test_file_response(self):
+        """ Test the file is streamed with immutable cache headers """
+        res = self.serve('file')
+
+        self.assertEqual(b''.join(res.streaming_content), b'image')
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', res['Cache-Control'])
+        res.close()
+
+        res = self.serve('file', HTTP_IF_MODIFIED_SINCE=res['Last-Modified'])
+        self.assertEqual(res.status_code, 304)
+
+    def test_x_accel_redirect(self):
+        """ Test nginx is told which internal location to serve """
+        res = self.serve('x-accel')
+
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['X-Accel-Redirect'],
+                         '/protected-media/upload/recipe/photo.jpg')
+        self.assertIn('immutable', res['Cache-Control'])
+
+    def test_x_sendfile(self):
+        """ Test the absolute file path is handed to the server """
+        res = self.serve('x-sendfile')
+
+        self.assertEqual(
+            res['X-Sendfile'],
+            os.path.join(self.media_root.name, self.name)
+        )
+
+    def test_outside_media_root(self):
+        """ Test paths escaping MEDIA_ROOT or missing files are 404 """
+        for path in ('../etc/passwd', '/etc/passwd',
+                     'upload/recipe/missing.jpg', 'upload/recipe'):
+            with self.assertRaises(Http404):
+                self.serve('x-accel', path)
@@ -0,0 +1,193 @@
+import asyncio
+import tempfile
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, \
+    override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import token_cache
+from core.instrumentation import current_profile
+from core.metrics import MetricsMiddleware, view_name
+from core.models import Recipe
+from recipe.views import RecipeViewSet
+
+METRICS_URL = reverse('metrics')
+RECIPE_URL = reverse('recipe:recipe-list')
+TOKEN_URL = reverse('user:token')
+
+
+def sample(name, **labels):
+    """ Return the current value of a metric sample """
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTests(TestCase):
+    """ Test the recorded metrics and their export """
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'metrics@theesh.com',
+            'testpass'
+        )
+        self.client = APIClient()
+
+    def test_request_latency_by_action(self):
+        """ Test latencies and queries are recorded by viewset action """
+        Recipe.objects.create(user=self.user, title='Curry',
+                              time_miniutes=5, price=5.00)
+        self.client.force_authenticate(self.user)
+        labels = {'view': 'RecipeViewSet.list', 'method': 'GET',
+                  'status': '200'}
+        count = sample('api_request_duration_seconds_count', **labels)
+        queries = sample('api_db_queries_total', view='RecipeViewSet.list')
+
+        self.client.get(RECIPE_URL)
+
+        self.assertEqual(
+            sample('api_request_duration_seconds_count', **labels),
+            count + 1
+        )
+        self.assertGreater(
+            sample('api_db_queries_total', view='RecipeViewSet.list'),
+            queries
+        )
+
+    def test_request_latency_api_view(self):
+        """ Test views other than viewsets are labelled by class """
+        labels = {'view': 'CreateTokenView', 'method': 'POST',
+                  'status': '200'}
+        count = sample('api_request_duration_seconds_count', **labels)
+
+        self.client.post(TOKEN_URL, {'email': 'metrics@theesh.com',
+                                     'password': 'testpass'})
+
+        self.assertEqual(
+            sample('api_request_duration_seconds_count', **labels),
+            count + 1
+        )
+
+    def test_view_name_extra_action(self):
+        """ Test extra viewset actions are labelled with their name """
+        view = RecipeViewSet.as_view({'post': 'upload_image'},
+                                     basename='recipe')
+
+        self.assertEqual(view_name(view, 'POST'),
+                         'RecipeViewSet.upload_image')
+        self.assertEqual(view_name(view, 'OPTIONS'), 'RecipeViewSet')
+
+    def test_token_cache_lookups(self):
+        """ Test token cache hits and misses are counted """
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        misses = sample('api_token_cache_total', result='miss')
+        hits = sample('api_token_cache_total', result='local')
+
+        self.client.get(RECIPE_URL)
+        self.client.get(RECIPE_URL)
+
+        self.assertEqual(sample('api_token_cache_total', result='miss'),
+                         misses + 1)
+        self.assertEqual(sample('api_token_cache_total', result='local'),
+                         hits + 1)
+
+    def test_statements_not_tracked(self):
+        """ Test the queries of requests that are not profiled are only
+        counted """
+        profiles = []
+        middleware = MetricsMiddleware(
+            lambda request: profiles.append(current_profile.get()) or
+            HttpResponse()
+        )
+
+        with override_settings(PERF_SAMPLE_RATE=0):
+            middleware(RequestFactory().get('/'))
+
+        self.assertFalse(profiles[0].track_statements)
+        profiles[0].record_query('SELECT 1', 0.1)
+        self.assertEqual(profiles[0].sql_count, 1)
+        self.assertFalse(profiles[0].statements)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_export(self):
+        """ Test the metrics are exported in the text format """
+        self.client.post(TOKEN_URL, {})
+
+        res = self.client.get(METRICS_URL,
+                              HTTP_AUTHORIZATION='Bearer secret')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        for name in (b'api_request_duration_seconds_bucket',
+                     b'api_db_connections_total',
+                     b'recipe_image_queue_depth'):
+            self.assertIn(name, res.content)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_export_off_without_token(self):
+        """ Test there is no export while no token is set """
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION='Bearer ')
+
+        self.assertEqual(res.status_code, 404)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_export_token(self):
+        """ Test the export requires the token when one is set """
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, 403)
+
+        res = self.client.get(METRICS_URL,
+                              HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(res.status_code, 200)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_export_multiprocess(self):
+        """ Test the values of every process are exported from the
+        multiprocess directory """
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.dict('os.environ',
+                           {'PROMETHEUS_MULTIPROC_DIR': directory}):
+            res = self.client.get(METRICS_URL,
+                                  HTTP_AUTHORIZATION='Bearer secret')
+
+        self.assertEqual(res.status_code, 200)
+
+
+class AsyncMetricsMiddlewareTests(SimpleTestCase):
+    """ Test the metrics middleware under ASGI """
+
+    def setUp(self):
+        async def view(request):
+            await asyncio.sleep(0.3)
+            return HttpResponse()
+
+        self.middleware = MetricsMiddleware(view)
+        self.factory = RequestFactory()
+
+    def test_async_requests_concurrent(self):
+        """ Test requests through the middleware run concurrently and are
+        recorded """
+        labels = {'view': 'unresolved', 'method': 'GET', 'status': '200'}
+        count = sample('api_request_duration_seconds_count', **labels)
+
+        async def requests():
+            await asyncio.gather(*(
+                self.middleware(self.factory.get('/')) for _ in range(5)
+            ))
+
+        start = time.perf_counter()
+        asyncio.run(requests())
+
+        self.assertTrue(asyncio.iscoroutinefunction(self.middleware))
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(
+            sample('api_request_duration_seconds_count', **labels),
+            count + 5
+        )
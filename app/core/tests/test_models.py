@@ -82,3 +82,62 @@ class ModelTests(TestCase):
 
         exp_path = f'upload/recipe/{uuid}.jpg'
         self.assertEqual(file_path, exp_path)
+
+    def test_recipe_relation_updates_timestamps(self):
+        """ Test adding a tag marks the recipe and tag modified """
+        user = sample_user()
+        recipe = models.Recipe.objects.create(
+            user=user,
+            title='Steak and mushroom sauce',
+            time_miniutes=5,
+            price=5.00,
+        )
+        tag = models.Tag.objects.create(user=user, name='Vegan')
+        recipe_modified = recipe.updated_at
+        tag_modified = tag.updated_at
+
+        recipe.tags.add(tag)
+
+        recipe.refresh_from_db()
+        tag.refresh_from_db()
+        self.assertGreater(recipe.updated_at, recipe_modified)
+        self.assertGreater(tag.updated_at, tag_modified)
+
+    def test_recipe_count_follows_relations(self):
+        """ Test recipe_count follows adds, removes, clears and
+        deletes from either side of the relation """
+        user = sample_user()
+        tag = models.Tag.objects.create(user=user, name='Vegan')
+        recipes = [
+            models.Recipe.objects.create(
+                user=user,
+                title=f'Recipe {i}',
+                time_miniutes=5,
+                price=5.00,
+            )
+            for i in range(3)
+        ]
+
+        def count():
+            tag.refresh_from_db()
+            return tag.recipe_count
+
+        for recipe in recipes:
+            recipe.tags.add(tag)
+        recipes[0].tags.add(tag)
+        self.assertEqual(count(), 3)
+
+        recipes[0].tags.remove(tag)
+        self.assertEqual(count(), 2)
+
+        recipes[1].tags.clear()
+        self.assertEqual(count(), 1)
+
+        tag.recipe_set.add(recipes[0], recipes[1])
+        self.assertEqual(count(), 3)
+
+        recipes[2].delete()
+        self.assertEqual(count(), 2)
+
+        tag.recipe_set.clear()
+        self.assertEqual(count(), 0)
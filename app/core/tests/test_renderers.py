@@ -0,0 +1,88 @@
+import datetime
+import io
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import FastJSONParser, FastJSONRenderer
+
+DATA = {
+    'id': 1,
+    'title': 'Crème brûlée\u2028',
+    'price': '12.30',
+    'amount': Decimal('1.50'),
+    'created': datetime.datetime(2020, 5, 1, 10, 30,
+                                 tzinfo=datetime.timezone.utc),
+    'day': datetime.date(2020, 5, 1),
+    'tags': [{'id': 2, 'name': 'Sweet'}],
+    'counts': {3: 4},
+    'link': None,
+}
+
+
+class FastJSONRendererTests(TestCase):
+    """ Test the fast JSON renderer matches JSONRenderer """
+
+    def test_same_output(self):
+        """ Test the rendered bytes are the same as JSONRenderer's """
+        self.assertEqual(FastJSONRenderer().render(DATA),
+                         JSONRenderer().render(DATA))
+
+    def test_indent_falls_back(self):
+        """ Test indented output is rendered by JSONRenderer """
+        media_type = 'application/json; indent=4'
+
+        self.assertEqual(
+            FastJSONRenderer().render(DATA, media_type),
+            JSONRenderer().render(DATA, media_type)
+        )
+
+    def test_unencodable_falls_back(self):
+        """ Test integers orjson can not encode are still rendered """
+        data = {'big': 2 ** 70}
+
+        self.assertEqual(FastJSONRenderer().render(data),
+                         JSONRenderer().render(data))
+
+    def test_without_orjson(self):
+        """ Test JSONRenderer is used when orjson is not installed """
+        with patch('core.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(DATA),
+                             JSONRenderer().render(DATA))
+
+    def test_none_renders_empty(self):
+        """ Test no data renders an empty body """
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+class FastJSONParserTests(TestCase):
+    """ Test the fast JSON parser matches JSONParser """
+
+    def parse(self, parser, body, encoding='utf-8'):
+        return parser.parse(io.BytesIO(body),
+                            parser_context={'encoding': encoding})
+
+    def test_same_data(self):
+        """ Test a body parses to the same data as with JSONParser """
+        body = '{"title": "Crème", "price": "5.10", "tags": [1, 2]}'
+
+        for encoding in ('utf-8', 'latin-1'):
+            self.assertEqual(
+                self.parse(FastJSONParser(), body.encode(encoding), encoding),
+                self.parse(JSONParser(), body.encode(encoding), encoding)
+            )
+
+    def test_invalid_json(self):
+        """ Test a malformed body raises a parse error """
+        for body in (b'{"title": ', b'{"price": NaN}'):
+            with self.assertRaises(ParseError):
+                self.parse(FastJSONParser(), body)
+
+    def test_without_orjson(self):
+        """ Test JSONParser is used when orjson is not installed """
+        with patch('core.renderers.orjson', None):
+            self.assertEqual(self.parse(FastJSONParser(), b'[1]'), [1])
@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+
+from core.models import Tag, Ingreedient, Recipe
+from core.seed import Seeder, copy_value
+
+
+class SeederTests(TestCase):
+    """ Test the bulk seeder """
+
+    def test_copy_value(self):
+        """ Test values are escaped for the text format of COPY """
+        self.assertEqual(copy_value(None), '\\N')
+        self.assertEqual(copy_value('a\tb\\c\n'), 'a\\tb\\\\c\\n')
+        self.assertEqual(copy_value(12), '12')
+
+    def test_seed(self):
+        """ Test users are created with their data and counts """
+        created = Seeder(batch_size=3).seed(users=2, tags=3, ingreedients=4,
+                                            recipes=5, per_recipe=2)
+
+        self.assertEqual(created, {'users': 2, 'tags': 6, 'ingreedients': 8,
+                                   'recipes': 10, 'links': 40})
+        self.assertEqual(Token.objects.count(), 2)
+        self.assertEqual(Tag.objects.count(), 6)
+        self.assertEqual(Ingreedient.objects.count(), 8)
+        self.assertEqual(Recipe.objects.count(), 10)
+        self.assertEqual(Recipe.tags.through.objects.count(), 20)
+        self.assertEqual(Recipe.ingreedient.through.objects.count(), 20)
+        for recipe in Recipe.objects.prefetch_related('tags'):
+            for tag in recipe.tags.all():
+                self.assertEqual(tag.user_id, recipe.user_id)
+        self.assertEqual(
+            sum(Tag.objects.values_list('recipe_count', flat=True)), 20
+        )
+        user = get_user_model().objects.get(email='seed-1@recipe.local')
+        self.assertTrue(user.check_password('seedpass'))
+        self.assertTrue(Recipe.objects.filter(
+            user=user, search_vector__isnull=False
+        ).exists())
+
+    def test_seed_deterministic(self):
+        """ Test the same seed generates the same recipes """
+        Seeder(prefix='first', seed=7).seed(1, 2, 2, 5, 1)
+        Seeder(prefix='second', seed=7).seed(1, 2, 2, 5, 1)
+
+        titles = [
+            list(Recipe.objects.filter(user__email__startswith=prefix)
+                 .order_by('id').values_list('title', 'price'))
+            for prefix in ('first', 'second')
+        ]
+        self.assertEqual(titles[0], titles[1])
+
+    def test_seed_batch_size(self):
+        """ Test the batch size does not change the data generated """
+        Seeder(prefix='first', batch_size=2).seed(3, 2, 2, 3, 1)
+        Seeder(prefix='second', batch_size=1000).seed(3, 2, 2, 3, 1)
+
+        data = [
+            list(Recipe.objects.filter(user__email__startswith=prefix)
+                 .order_by('id').values_list('title', 'tags__name'))
+            for prefix in ('first', 'second')
+        ]
+        self.assertEqual(data[0], data[1])
+
+    def test_clear(self):
+        """ Test only the users of the prefix are deleted """
+        other = get_user_model().objects.create_user('other@theesh.com')
+        longer = Seeder(prefix='clear-more')
+        longer.seed(1, 0, 0, 0, 0)
+        seeder = Seeder(prefix='clear', batch_size=1)
+        seeder.seed(2, 1, 1, 2, 1)
+
+        seeder.clear()
+
+        self.assertEqual(
+            list(get_user_model().objects.order_by('id')),
+            [other, *longer.seeded_users()]
+        )
+        self.assertEqual(longer.seeded_users().count(), 1)
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(Tag.objects.exists())
+        self.assertFalse(Recipe.ingreedient.through.objects.exists())
@@ -0,0 +1,12 @@
+from django.test import SimpleTestCase
+
+from core.utils import chunks
+
+
+class UtilsTests(SimpleTestCase):
+    """ Test the shared helpers """
+
+    def test_chunks(self):
+        """ Test an iterable is split in lists of the chunk size """
+        self.assertEqual(list(chunks(iter(range(5)), 2)),
+                         [[0, 1], [2, 3], [4]])
@@ -0,0 +1,12 @@
+import itertools
+
+
+def chunks(iterable, size):
+    """ Yield lists of at most size items of iterable, so a generator
+    of any length is consumed with a bounded list in memory """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,64 @@
+import asyncio
+import contextvars
+import functools
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.urls import URLPattern
+
+from core.db import WorkerPool, mark_kept_connections
+from core.instrumentation import timed
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# The read pool, its size bounding the connections used by reads
+pool = WorkerPool('ASYNC_READ_WORKERS', 'async-reads')
+
+
+def run_view(view, request, *args, **kwargs):
+    """ Run a sync view to a rendered response on a pool worker """
+    close_old_connections()
+    mark_kept_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            with timed('render'):
+                response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view):
+    """ Return an async version of a sync view which runs reads on the
+    read pool, so a slow query only holds one of its workers. Writes go
+    through sync_to_async like any sync view under ASGI """
+    write_view = sync_to_async(view)
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in READ_METHODS:
+            return await write_view(request, *args, **kwargs)
+
+        # Run with the request's context, so its profile records the
+        # queries made on the worker
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            pool.get(),
+            functools.partial(context.run, run_view, view, request,
+                              *args, **kwargs)
+        )
+
+    return wrapper
+
+
+def async_read_urlpatterns(patterns, names):
+    """ Return patterns with the views of the named ones made async
+    read views """
+    return [
+        URLPattern(pattern.pattern, async_read_view(pattern.callback),
+                   pattern.default_args, pattern.name)
+        if pattern.name in names else pattern
+        for pattern in patterns
+    ]
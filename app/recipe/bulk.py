@@ -0,0 +1,293 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from core.models import count_recipes, touch
+from core.signals import deleting_in_bulk
+from recipe.cache import bump_data_version
+from recipe.fields import BatchedManyRelatedField
+
+# Per item status of valid items in a batch that failed as a whole
+STATUS_FAILED_DEPENDENCY = 424
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """ Write a list of objects with a handful of bulk statements instead
+    of a few queries per object """
+
+    @property
+    def model(self):
+        """ Return the model of the child serializer """
+        return self.child.Meta.model
+
+    def to_internal_value(self, data):
+        """ Resolve the related objects of all items with a query per
+        relation before validating the items """
+        if isinstance(data, list):
+            for field in self.child.fields.values():
+                if isinstance(field, BatchedManyRelatedField) and \
+                        not field.read_only:
+                    field.prefetch(
+                        item[field.field_name] for item in data
+                        if isinstance(item, dict) and field.field_name in item
+                    )
+
+        return super().to_internal_value(data)
+
+    def split_relations(self, validated_data):
+        """ Separate many to many values from the model attributes """
+        names = [field.name for field in self.model._meta.many_to_many]
+        relations = [
+            {name: attrs.pop(name) for name in names if name in attrs}
+            for attrs in validated_data
+        ]
+
+        return validated_data, relations
+
+    def set_relations(self, objs, relations, replace=False):
+        """ Write the join table rows of the objects, replacing the
+        existing rows of the relations present if replace is set """
+        touched = {}
+        for field in self.model._meta.many_to_many:
+            through = field.remote_field.through
+            source = field.m2m_field_name() + '_id'
+            target = field.m2m_reverse_field_name() + '_id'
+            changed = [
+                (obj, related[field.name])
+                for obj, related in zip(objs, relations)
+                if field.name in related
+            ]
+            if not changed:
+                continue
+
+            target_ids = set()
+            if replace:
+                rows = through.objects.filter(
+                    **{source + '__in': [obj.pk for obj, values in changed]}
+                )
+                target_ids.update(rows.values_list(target, flat=True))
+                rows.delete()
+
+            links = []
+            for obj, values in changed:
+                for pk in dict.fromkeys(value.pk for value in values):
+                    links.append(through(**{source: obj.pk, target: pk}))
+                    target_ids.add(pk)
+            through.objects.bulk_create(links)
+            touched[field.related_model] = target_ids
+
+        for model, pks in touched.items():
+            queryset = model.objects.filter(pk__in=pks)
+            touch(queryset)
+            count_recipes(queryset)
+
+    def touch_referencing(self, objs):
+        """ Mark the objects showing the updated objects as modified """
+        for relation in self.model._meta.related_objects:
+            if relation.many_to_many:
+                touch(relation.related_model.objects.filter(
+                    **{relation.field.name + '__in': objs}
+                ))
+
+    def create(self, validated_data):
+        """ Insert all objects and their relations """
+        validated_data, relations = self.split_relations(validated_data)
+        objs = self.model.objects.bulk_create(
+            [self.model(**attrs) for attrs in validated_data]
+        )
+        self.set_relations(objs, relations)
+
+        return objs
+
+    def update(self, instances, validated_data):
+        """ Update objects matched by position with validated_data """
+        validated_data, relations = self.split_relations(validated_data)
+        now = timezone.now()
+        fields = {'updated_at'}
+        for obj, attrs in zip(instances, validated_data):
+            for name, value in attrs.items():
+                setattr(obj, name, value)
+            obj.updated_at = now
+            fields.update(attrs)
+
+        self.model.objects.bulk_update(instances, fields)
+        self.set_relations(instances, relations, replace=True)
+        self.touch_referencing(instances)
+
+        return instances
+
+
+class BulkMixin:
+    """ Create, update and delete lists of objects in one request, in
+    one transaction, with a result per item """
+
+    def check_bulk_items(self, items):
+        """ Return an error response if items is not a usable batch """
+        if not isinstance(items, list) or not items:
+            detail = _('Expected a non empty list of items.')
+        elif len(items) > settings.API_MAX_BULK_SIZE:
+            detail = _('At most %d items can be sent at once.') % \
+                settings.API_MAX_BULK_SIZE
+        else:
+            return None
+
+        return Response({'detail': detail}, status=status.HTTP_400_BAD_REQUEST)
+
+    def get_bulk_ids(self, items):
+        """ Return the ids of items, or None if any is missing or
+        repeated """
+        ids = [
+            item.get('id') if isinstance(item, dict) else item
+            for item in items
+        ]
+        if not all(isinstance(pk, int) for pk in ids) or \
+                len(set(ids)) != len(ids):
+            return None
+
+        return ids
+
+    def invalid_response(self, errors):
+        """ Return the per item errors of a rejected batch """
+        if not isinstance(errors, list):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        results = [
+            {'index': index, 'status': status.HTTP_400_BAD_REQUEST,
+             'errors': item_errors}
+            if item_errors else
+            {'index': index, 'status': STATUS_FAILED_DEPENDENCY}
+            for index, item_errors in enumerate(errors)
+        ]
+        return Response({'results': results},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    @action(methods=['POST', 'PATCH', 'DELETE'], detail=False)
+    def bulk(self, request):
+        """ Create (POST), partially update (PATCH) or delete (DELETE)
+        the listed objects """
+        error = self.check_bulk_items(request.data)
+        if error is not None:
+            return error
+
+        handler = {
+            'POST': self.bulk_create,
+            'PATCH': self.bulk_update,
+            'DELETE': self.bulk_delete,
+        }[request.method]
+        return handler(request.data)
+
+    def bulk_create(self, items):
+        """ Validate and insert every item """
+        serializer = self.get_serializer(data=items, many=True)
+        if not serializer.is_valid():
+            return self.invalid_response(serializer.errors)
+
+        with transaction.atomic():
+            objs = serializer.save(user=self.request.user)
+            bump_data_version(self.request.user.pk)
+
+        results = [
+            {'index': index, 'status': status.HTTP_201_CREATED, 'id': obj.pk}
+            for index, obj in enumerate(objs)
+        ]
+        return Response({'results': results}, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, items):
+        """ Validate and partially update every item, identified by
+        its id """
+        ids = self.get_bulk_ids(items)
+        if ids is None:
+            return Response(
+                {'detail': _('Every item needs a distinct integer id.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        instances = self.get_queryset().in_bulk(ids)
+        if len(instances) != len(ids):
+            return self.invalid_response([
+                {} if pk in instances else {'id': [_('Not found.')]}
+                for pk in ids
+            ])
+
+        serializer = self.get_serializer(
+            [instances[pk] for pk in ids],
+            data=items,
+            many=True,
+            partial=True
+        )
+        if not serializer.is_valid():
+            return self.invalid_response(serializer.errors)
+
+        with transaction.atomic():
+            serializer.save()
+            bump_data_version(self.request.user.pk)
+
+        results = [
+            {'index': index, 'status': status.HTTP_200_OK, 'id': pk}
+            for index, pk in enumerate(ids)
+        ]
+        return Response({'results': results})
+
+    def get_linked_pks(self, model, pks):
+        """ Return the pks of the objects linked to the pks of model
+        through many to many fields, by model, with a query per
+        relation """
+        fields = [(field, field.m2m_field_name(),
+                   field.m2m_reverse_field_name())
+                  for field in model._meta.many_to_many]
+        fields += [(relation.field, relation.field.m2m_reverse_field_name(),
+                    relation.field.m2m_field_name())
+                   for relation in model._meta.related_objects
+                   if relation.many_to_many]
+
+        linked = {}
+        for field, source, target in fields:
+            through = field.remote_field.through
+            other = through._meta.get_field(target).related_model
+            linked[other] = set(through.objects.filter(
+                **{source + '__in': pks}
+            ).values_list(target + '_id', flat=True))
+
+        return linked
+
+    def bulk_delete(self, items):
+        """ Delete every listed id that exists """
+        ids = self.get_bulk_ids(items)
+        if ids is None:
+            return Response(
+                {'detail': _('Expected a list of distinct integer ids.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        model = self.get_queryset().model
+        found = set(
+            self.get_queryset().filter(pk__in=ids).values_list('pk', flat=True)
+        )
+        # The tags and ingreedients of deleted recipes count them
+        counting = {field.related_model
+                    for field in model._meta.many_to_many}
+        # The per object delete handlers would run these statements for
+        # each deleted object
+        with transaction.atomic(), deleting_in_bulk():
+            linked = self.get_linked_pks(model, found)
+            model.objects.filter(pk__in=found).delete()
+            for other, pks in linked.items():
+                if not pks:
+                    continue
+                queryset = other.objects.filter(pk__in=pks)
+                touch(queryset)
+                if other in counting:
+                    count_recipes(queryset)
+            bump_data_version(self.request.user.pk)
+
+        results = [
+            {'index': index, 'id': pk,
+             'status': status.HTTP_204_NO_CONTENT if pk in found
+             else status.HTTP_404_NOT_FOUND}
+            for index, pk in enumerate(ids)
+        ]
+        return Response({'results': results})
@@ -0,0 +1,126 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from recipe.conditional import add_validators, etag_matches, not_modified
+from recipe.params import normalize_params
+
+
+def get_cache():
+    """ Return the cache the recipe responses are stored in """
+    return caches[settings.RECIPE_CACHE_ALIAS]
+
+
+def version_key(user_id):
+    """ Return the cache key of a user's data version """
+    return f'recipe-data-version:{user_id}'
+
+
+def get_data_version(user_id):
+    """ Return the version of a user's recipe data """
+    cache = get_cache()
+    key = version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock rather than 1 so an evicted counter can
+        # not reuse the keys of responses cached before the eviction
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+
+    return version
+
+
+def _incr_data_version(user_id):
+    """ Move a user's data version forward """
+    cache = get_cache()
+    key = version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def bump_data_version(user_id):
+    """ Invalidate every cached response of a user.
+
+    The version is bumped straight away so reads in the same transaction
+    miss, and again on commit so a response cached from data read before
+    the commit is never served.
+    """
+    _incr_data_version(user_id)
+    transaction.on_commit(lambda: _incr_data_version(user_id))
+
+
+class CachedResponseMixin:
+    """ Serve read actions of a viewset from a cache keyed on the user,
+    the version of their data and the request """
+
+    def get_response_cache_key(self, request):
+        """ Return the cache key of the current request """
+        # The data holds absolute URLs, such as the next page
+        request_key = '|'.join((
+            request.scheme,
+            request.get_host(),
+            self.basename,
+            self.action,
+            str(self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)),
+            normalize_params(request.query_params),
+        ))
+        digest = hashlib.sha256(request_key.encode()).hexdigest()
+        version = get_data_version(request.user.pk)
+        return f'recipe-response:{request.user.pk}:{version}:{digest}'
+
+    def get_validators(self, request):
+        """ Return the (etag, last_modified) of the current request,
+        stored alongside the cached data """
+        return None, None
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """ Return the cached response data or call handler and cache
+        its result, answering If-None-Match from the validators """
+        cache = get_cache()
+        key = self.get_response_cache_key(request)
+        entry = cache.get(key)
+
+        if entry is None:
+            # Validators are read before the data so they never describe
+            # data newer than the response they are sent with
+            etag, last_modified = self.get_validators(request)
+            if etag_matches(request, etag):
+                return not_modified(etag, last_modified)
+
+            response = handler(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(key, (response.data, etag, last_modified),
+                          settings.RECIPE_CACHE_TIMEOUT)
+        else:
+            data, etag, last_modified = entry
+            if etag_matches(request, etag):
+                return not_modified(etag, last_modified)
+
+            response = Response(data)
+
+        if response.status_code == status.HTTP_200_OK:
+            add_validators(response, etag, last_modified)
+
+        return response
+
+
+class CachedListMixin(CachedResponseMixin):
+
+    def list(self, request, *args, **kwargs):
+        """ List objects through the response cache """
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+
+    def retrieve(self, request, *args, **kwargs):
+        """ Retrieve an object through the response cache """
+        return self.cached_response(super().retrieve, request, *args,
+                                    **kwargs)
@@ -0,0 +1,81 @@
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.http import http_date, parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from recipe.params import normalize_params
+
+
+def make_etag(*parts):
+    """ Return a strong ETag for the given parts """
+    value = '|'.join(str(part) for part in parts)
+    return '"%s"' % hashlib.sha256(value.encode()).hexdigest()
+
+
+def etag_matches(request, etag):
+    """ Return whether the request's If-None-Match covers the etag """
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header or etag is None:
+        return False
+
+    etags = parse_etags(header)
+    return '*' in etags or etag in etags or f'W/{etag}' in etags
+
+
+def add_validators(response, etag, last_modified):
+    """ Set the ETag and Last-Modified headers of a response """
+    if etag is not None:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+
+    return response
+
+
+def not_modified(etag, last_modified):
+    """ Return an empty 304 response """
+    response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    return add_validators(response, etag, last_modified)
+
+
+class ConditionalGetMixin:
+    """ Compute ETag and Last-Modified for list and retrieve from
+    updated_at, without serializing anything """
+
+    def get_validators(self, request):
+        """ Return the (etag, last_modified) of the current request """
+        request_parts = (
+            request.user.pk,
+            self.basename,
+            self.action,
+            normalize_params(request.query_params),
+        )
+
+        if self.action == 'list':
+            queryset = self.filter_queryset(self.get_queryset())
+            stats = queryset.aggregate(
+                last_modified=Max('updated_at'),
+                count=Count('pk'),
+            )
+            last_modified = stats['last_modified']
+            etag = make_etag(*request_parts, last_modified, stats['count'])
+            return etag, last_modified
+
+        if self.action == 'retrieve':
+            lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+            try:
+                last_modified = self.get_queryset().filter(
+                    **{self.lookup_field: lookup}
+                ).values_list('updated_at', flat=True).first()
+            except (TypeError, ValueError, ValidationError):
+                last_modified = None
+
+            if last_modified is None:
+                return None, None
+            etag = make_etag(*request_parts, lookup, last_modified)
+            return etag, last_modified
+
+        return None, None
@@ -0,0 +1,163 @@
+import csv
+import io
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils.translation import gettext_lazy as _
+from rest_framework import renderers
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException
+
+from core.utils import chunks
+
+
+class ExportUnavailable(APIException):
+    """ The export was sent to an ASGI worker, which cannot stream it """
+    status_code = 421
+    default_detail = _('Exports are served by the WSGI workers.')
+    default_code = 'export_unavailable'
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """ Newline delimited JSON, an object per line """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """ Render a single object, such as an error, as one line """
+        return self.render_rows([data])
+
+    def render_rows(self, rows, fields=None):
+        """ Return the bytes of rows, one line each """
+        return ''.join(
+            json.dumps(row, ensure_ascii=False, separators=(',', ':')) +
+            '\n' for row in rows
+        ).encode()
+
+    def render_header(self, fields):
+        """ Return the bytes written before the rows, none """
+        return b''
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """ Comma separated values under a header row, with the names of
+    related objects joined in one cell """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+    separator = '; '
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """ Render a single object, such as an error, as a header row
+        and a row of values """
+        if not isinstance(data, dict):
+            data = {'detail': data}
+        return self.render_header(data) + self.render_rows([data], data)
+
+    def render_cell(self, value):
+        """ Return value as the text of a cell """
+        if isinstance(value, (list, tuple)):
+            return self.separator.join(str(item) for item in value)
+        return value
+
+    def render_rows(self, rows, fields):
+        """ Return the bytes of rows, their values in the order of
+        fields """
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerows(
+            [self.render_cell(row[field]) for field in fields]
+            for row in rows
+        )
+        return output.getvalue().encode()
+
+    def render_header(self, fields):
+        """ Return the bytes of the header row """
+        output = io.StringIO()
+        csv.writer(output).writerow(fields)
+        return output.getvalue().encode()
+
+
+class ExportMixin:
+    """ Stream every object of the user, in the format of the export
+    renderer negotiated from the Accept header or ?format= """
+    export_serializer_class = None
+    export_fields = ()
+    # Many to many fields exported as the names of the related objects
+    export_relations = ()
+
+    def get_export_queryset(self):
+        """ Return the values of the exported columns of the objects, in
+        a stable order """
+        columns = [field for field in self.export_fields
+                   if field not in self.export_relations]
+        return self.filter_queryset(self.get_queryset()).order_by('pk') \
+            .values(*columns)
+
+    def get_related_names(self, field, pks):
+        """ Return the sorted names of the objects related through field
+        to each of pks, with one query """
+        relation = self.queryset.model._meta.get_field(field)
+        source = relation.m2m_field_name()
+        target = relation.m2m_reverse_field_name()
+        links = relation.remote_field.through.objects.filter(
+            **{source + '__in': pks}
+        ).order_by(target + '__name').values_list(source, target + '__name')
+
+        names = defaultdict(list)
+        for pk, name in links:
+            names[pk].append(name)
+        return names
+
+    def export_chunks(self, queryset, renderer):
+        """ Yield the rendered objects of queryset a chunk at a time.
+        The rows are read through a server side cursor, which needs a
+        transaction on PostgreSQL to send the first rows before the
+        query is done, and the related names of each chunk are fetched
+        with one query per relation """
+        chunk_size = settings.API_EXPORT_CHUNK_SIZE
+        serializer = self.export_serializer_class(
+            context=self.get_serializer_context()
+        )
+        yield renderer.render_header(self.export_fields)
+
+        with transaction.atomic():
+            rows = queryset.iterator(chunk_size=chunk_size)
+            for chunk in chunks(rows, chunk_size):
+                pks = [row['id'] for row in chunk]
+                for field in self.export_relations:
+                    names = self.get_related_names(field, pks)
+                    for row in chunk:
+                        row[field] = names.get(row['id'], [])
+
+                yield renderer.render_rows(
+                    [serializer.to_representation(row) for row in chunk],
+                    self.export_fields
+                )
+
+    @action(methods=['GET'], detail=False,
+            renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request):
+        """ Stream every object as NDJSON or CSV. Django 3.2 iterates
+        streaming content on the event loop under ASGI, where the queries
+        of each chunk would hold up every other request of the worker,
+        so the proxy routes exports to the WSGI workers and ASGI workers
+        refuse them """
+        if isinstance(request._request, ASGIRequest):
+            raise ExportUnavailable()
+
+        queryset = self.get_export_queryset()
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            self.export_chunks(queryset, renderer),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        response['Content-Disposition'] = \
+            f'attachment; filename="{self.basename}s.{renderer.format}"'
+
+        return response
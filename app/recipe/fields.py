@@ -0,0 +1,82 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS, ManyRelatedField
+
+
+class BatchedManyRelatedField(ManyRelatedField):
+    """ Resolve every submitted primary key with a single query and
+    report all missing ones together """
+    default_error_messages = {
+        'does_not_exist': _('Invalid pks {pks} - objects do not exist.'),
+    }
+
+    def to_pks(self, data):
+        """ Return the submitted primary keys as integers """
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        pks = []
+        for item in data:
+            if isinstance(item, bool):
+                self.child_relation.fail('incorrect_type',
+                                         data_type=type(item).__name__)
+            try:
+                pks.append(int(item))
+            except (TypeError, ValueError):
+                self.child_relation.fail('incorrect_type',
+                                         data_type=type(item).__name__)
+
+        return pks
+
+    def prefetch(self, values):
+        """ Resolve the primary keys of every value of a batch with a
+        single query, for the items to look up rather than query. Values
+        that are not valid are left for their item to report """
+        pks = []
+        for data in values:
+            try:
+                pks.extend(self.to_pks(data))
+            except serializers.ValidationError:
+                continue
+
+        prefetched = self.context.setdefault('prefetched_relations', {})
+        prefetched[self.field_name] = \
+            self.child_relation.get_queryset().in_bulk(pks)
+
+    def to_internal_value(self, data):
+        pks = self.to_pks(data)
+        objects = self.context.get('prefetched_relations', {}).get(
+            self.field_name
+        )
+        if objects is None:
+            objects = self.child_relation.get_queryset().in_bulk(pks)
+
+        missing = [pk for pk in dict.fromkeys(pks) if pk not in objects]
+        if missing:
+            self.fail('does_not_exist', pks=missing)
+
+        return [objects[pk] for pk in pks]
+
+
+class UserPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """ Primary key field limited to objects owned by the requesting
+    user """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated:
+            return queryset.none()
+
+        return queryset.filter(user=request.user)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+
+        return BatchedManyRelatedField(**list_kwargs)
@@ -0,0 +1,172 @@
+import io
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from core.db import WorkerPool
+from core.metrics import image_queue_depth
+from core.models import Recipe
+from recipe.cache import bump_data_version
+
+logger = logging.getLogger(__name__)
+
+FORMAT_EXTENSIONS = {'jpeg': 'jpg', 'webp': 'webp'}
+FORMAT_OPTIONS = {
+    'jpeg': {'quality': 85, 'optimize': True, 'progressive': True},
+    'webp': {'quality': 80, 'method': 4},
+}
+
+pool = WorkerPool('RECIPE_IMAGE_WORKERS', 'recipe-images')
+_lock = threading.Lock()
+_pending = 0
+
+
+def variant_formats():
+    """ Return the configured formats this Pillow build can encode """
+    return [
+        fmt for fmt in settings.RECIPE_IMAGE_VARIANT_FORMATS
+        if fmt != 'webp' or features.check('webp')
+    ]
+
+
+def variant_name(name, width, fmt):
+    """ Return the storage name of a derivative, next to the original """
+    root, _ = os.path.splitext(name)
+    return f'{root}_{width}w.{FORMAT_EXTENSIONS[fmt]}'
+
+
+def variant_key(width, fmt):
+    """ Return the key of a derivative in the API and in
+    Recipe.image_variant_keys """
+    return f'{width}w_{fmt}'
+
+
+def image_variant_urls(recipe, request=None):
+    """ Return the URLs of the derivatives of a recipe's image written
+    so far keyed by width and format, or None if there is no image """
+    if not recipe.image:
+        return None
+
+    written = set(recipe.image_variant_keys)
+    urls = {}
+    for width in settings.RECIPE_IMAGE_VARIANT_WIDTHS:
+        for fmt in variant_formats():
+            if variant_key(width, fmt) not in written:
+                continue
+            url = default_storage.url(
+                variant_name(recipe.image.name, width, fmt)
+            )
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls[variant_key(width, fmt)] = url
+
+    return urls
+
+
+def delete_variants(name):
+    """ Delete the derivatives of an image, of any configured width and
+    format """
+    for width in settings.RECIPE_IMAGE_VARIANT_WIDTHS:
+        for fmt in FORMAT_EXTENSIONS:
+            target = variant_name(name, width, fmt)
+            if default_storage.exists(target):
+                default_storage.delete(target)
+
+
+def generate_variants(name):
+    """ Write every resized and re-encoded derivative of an image and
+    return their keys """
+    with default_storage.open(name) as image_file:
+        image = Image.open(image_file)
+        image.load()
+
+    image = ImageOps.exif_transpose(image)
+    keys = []
+
+    if image.mode not in ('RGB', 'RGBA'):
+        has_alpha = 'A' in image.mode or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    for width in settings.RECIPE_IMAGE_VARIANT_WIDTHS:
+        resized = image.copy()
+        resized.thumbnail((width, resized.height), Image.LANCZOS)
+
+        for fmt in variant_formats():
+            encoded = resized
+            if fmt == 'jpeg' and encoded.mode == 'RGBA':
+                encoded = encoded.convert('RGB')
+
+            buffer = io.BytesIO()
+            encoded.save(buffer, format=fmt.upper(), **FORMAT_OPTIONS[fmt])
+
+            target = variant_name(name, width, fmt)
+            if default_storage.exists(target):
+                default_storage.delete(target)
+            default_storage.save(target, ContentFile(buffer.getvalue()))
+            keys.append(variant_key(width, fmt))
+
+    return keys
+
+
+def record_variants(recipe_id, name, keys):
+    """ Expose the derivatives of keys on the recipe, unless its image was
+    replaced meanwhile, and invalidate the responses showing it """
+    now = timezone.now()
+    recipes = Recipe.objects.filter(pk=recipe_id, image=name)
+    user_ids = list(recipes.values_list('user_id', flat=True))
+    recipes.update(image_variant_keys=keys, updated_at=now)
+    for user_id in user_ids:
+        bump_data_version(user_id)
+
+
+def queue_depth():
+    """ Return the number of images waiting for or being processed """
+    return _pending
+
+
+def process_image(recipe_id, name, replaced=None):
+    """ Generate and record the derivatives of a recipe's image, deleting
+    those of the image it replaced. Failures are logged, leaving the
+    derivatives missing for generate_image_variants to retry """
+    try:
+        if replaced and replaced != name:
+            delete_variants(replaced)
+        record_variants(recipe_id, name, generate_variants(name))
+    except Exception:
+        logger.exception('Failed to generate derivatives of %s', name)
+
+
+def _run(*args):
+    """ Process an image on a worker """
+    global _pending
+    try:
+        process_image(*args)
+    finally:
+        with _lock:
+            _pending -= 1
+        image_queue_depth.dec()
+        close_old_connections()
+
+
+def _submit(*args):
+    """ Queue an image on the worker pool """
+    global _pending
+    with _lock:
+        _pending += 1
+    image_queue_depth.inc()
+    pool.get().submit(_run, *args)
+
+
+def schedule_variants(recipe, replaced=None):
+    """ Generate the derivatives of a recipe's image off the request
+    thread, once the current transaction has committed, deleting those
+    of the image it replaced """
+    name = recipe.image.name
+    transaction.on_commit(lambda: _submit(recipe.pk, name, replaced))
@@ -0,0 +1,219 @@
+import asyncio
+import io
+import statistics
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.urls import include, path, reverse
+from rest_framework.authtoken.models import Token
+
+from core.db import close_pool_connections, connection_stats
+from core.seed import Seeder
+from recipe import async_views, urls as recipe_urls
+
+HOST = 'localhost'
+
+
+def async_urlconf():
+    """ Return a URLconf serving the recipe API with async reads """
+    urlconf = types.ModuleType('async_urls')
+    urlconf.urlpatterns = [
+        path('api/recipe/', include(
+            (recipe_urls.get_routes(async_reads=True), 'recipe')
+        )),
+    ]
+    return urlconf
+
+
+class QueryDelay:
+    """ Add a fixed delay to every query, standing in for a slow
+    database """
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.active = True
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.active:
+            time.sleep(self.delay)
+        return execute(sql, params, many, context)
+
+    def install(self, connection, **kwargs):
+        """ Delay the queries of connection """
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+def summary(latencies, elapsed, errors):
+    """ Return a line describing a run """
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+    return (
+        f'{len(latencies) / elapsed:.1f} req/s, '
+        f'p50 {statistics.median(latencies or [0]) * 1000:.1f} ms, '
+        f'p95 {p95 * 1000:.1f} ms, {errors} errors'
+    )
+
+
+class Command(BaseCommand):
+    """ Django command to compare the throughput of the recipe list
+    under WSGI and ASGI with slow queries """
+    help = 'Compare WSGI and ASGI throughput of the recipe list with ' \
+           'concurrent clients and a simulated query delay'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=32,
+                            help='Clients sending requests at once')
+        parser.add_argument('--threads', type=int, default=8,
+                            help='Worker threads of the WSGI server')
+        parser.add_argument('--query-delay', type=float, default=20,
+                            help='Milliseconds added to every query')
+        parser.add_argument('--recipes', type=int, default=50)
+
+    # Part of every query string, so no run is served from the response
+    # cache filled by an earlier one
+    run_id = 0
+
+    def seed(self, count):
+        """ Create a user with recipes and return their token """
+        self.seeder = Seeder(prefix='benchmark-asgi')
+        self.seeder.seed(1, 1, 0, count, 1)
+
+        return Token.objects.get(user__in=self.seeder.seeded_users())
+
+    def run_wsgi(self, url, token, options):
+        """ Send the requests to the WSGI handler from a thread per
+        server worker """
+        handler = WSGIHandler()
+
+        def send(index):
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': url,
+                'QUERY_STRING': f'request={self.run_id}-{index}',
+                'SERVER_NAME': HOST,
+                'SERVER_PORT': '80',
+                'HTTP_HOST': HOST,
+                'HTTP_AUTHORIZATION': f'Token {token}',
+                'wsgi.input': io.BytesIO(),
+                'wsgi.url_scheme': 'http',
+                'wsgi.errors': io.StringIO(),
+            }
+            statuses = []
+            start = time.perf_counter()
+            response = handler(environ, lambda status, headers:
+                               statuses.append(status))
+            b''.join(response)
+            response.close()
+            return time.perf_counter() - start, statuses[0][:3] == '200'
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            results = list(pool.map(send, range(options['requests'])))
+            elapsed = time.perf_counter() - start
+            close_pool_connections(pool, options['threads'])
+
+        return results, elapsed
+
+    def run_asgi(self, url, token, options):
+        """ Send the requests to the ASGI handler from concurrent
+        clients """
+        handler = ASGIHandler()
+        headers = [
+            (b'host', HOST.encode()),
+            (b'authorization', f'Token {token}'.encode()),
+        ]
+
+        async def send(index):
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': url,
+                'raw_path': url.encode(),
+                'query_string': f'request={self.run_id}-{index}'.encode(),
+                'headers': headers,
+                'server': (HOST, 80),
+                'client': ('127.0.0.1', 0),
+            }
+            messages = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send_message(message):
+                messages.append(message)
+
+            start = time.perf_counter()
+            await handler(scope, receive, send_message)
+            return time.perf_counter() - start, messages[0]['status'] == 200
+
+        async def client(indexes, results):
+            for index in indexes:
+                results.append(await send(index))
+
+        async def main():
+            indexes = iter(range(options['requests']))
+            results = []
+            start = time.perf_counter()
+            await asyncio.gather(*(
+                client(indexes, results)
+                for _ in range(options['concurrency'])
+            ))
+            elapsed = time.perf_counter() - start
+            # Runs on the thread the sync views ran on
+            await sync_to_async(connections.close_all)()
+            return results, elapsed
+
+        return asyncio.run(main())
+
+    def handle(self, *args, **options):
+        """ Handling custom commands """
+        token = self.seed(options['recipes'])
+        url = reverse('recipe:recipe-list')
+        delay = QueryDelay(options['query_delay'] / 1000)
+        connection_created.connect(delay.install)
+        for connection in connections.all():
+            delay.install(connection)
+
+        try:
+            runs = (
+                ('wsgi', self.run_wsgi, settings.ROOT_URLCONF),
+                ('asgi, sync views', self.run_asgi, settings.ROOT_URLCONF),
+                ('asgi, async reads', self.run_asgi, async_urlconf()),
+            )
+            for run_id, (name, run, urlconf) in enumerate(runs):
+                self.run_id = run_id
+                connection_stats.reset()
+                with override_settings(ROOT_URLCONF=urlconf,
+                                       ALLOWED_HOSTS=[HOST]):
+                    results, elapsed = run(url, token.key, options)
+
+                errors = sum(1 for _, ok in results if not ok)
+                latencies = [latency for latency, _ in results]
+                opened = connection_stats.snapshot()['opened']
+                self.stdout.write(
+                    f'{name}: {summary(latencies, elapsed, errors)}, '
+                    f'{opened} connections opened'
+                )
+        finally:
+            # Pool threads outlive the command with the wrapper installed
+            delay.active = False
+            async_views.pool.close_connections()
+            connection_created.disconnect(delay.install)
+            for connection in connections.all():
+                if delay in connection.execute_wrappers:
+                    connection.execute_wrappers.remove(delay)
+            self.seeder.clear()
@@ -0,0 +1,74 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Tag, Ingreedient
+from core.seed import Seeder
+from recipe import views
+from recipe.management.commands.explain_queries import get_view_queryset
+
+
+def time_queryset(queryset, repeat):
+    """ Return the timings in milliseconds of evaluating a fresh copy
+    of queryset repeat times """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        list(queryset.all())
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return timings
+
+
+def seed_recipes(count, names, per_recipe):
+    """ Create a user with count recipes, each with per_recipe of the
+    names tags and ingreedients, and return the user """
+    seeder = Seeder(prefix='benchmark')
+    seeder.seed(1, names, names, count, per_recipe)
+
+    return seeder.seeded_users().get()
+
+
+class Command(BaseCommand):
+    """ Django command to time the assigned only tag and ingreedient
+    queries against generated data """
+    help = 'Compare the assigned_only list queries on generated data, ' \
+           'which is rolled back afterwards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=20000)
+        parser.add_argument('--names', type=int, default=50,
+                            help='Tags and ingreedients to create')
+        parser.add_argument('--per-recipe', type=int, default=5,
+                            help='Tags and ingreedients of each recipe')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        """ Handling custom commands """
+        with transaction.atomic():
+            user = seed_recipes(options['recipes'], options['names'],
+                                options['per_recipe'])
+
+            for name, viewset, model in (
+                ('tags', views.TagViewSet, Tag),
+                ('ingreedients', views.IngreedientViewSet, Ingreedient),
+            ):
+                page_size = viewset.pagination_class.page_size
+                joined = model.objects.filter(
+                    user=user, recipe__isnull=False
+                ).order_by('-name').distinct()[:page_size + 1]
+                exists = get_view_queryset(viewset, user, 'list',
+                                           {'assigned_only': '1'})
+
+                for label, queryset in (('join + distinct', joined),
+                                        ('exists', exists)):
+                    timings = time_queryset(queryset, options['repeat'])
+                    self.stdout.write(
+                        f'{name} assigned only, {label}: '
+                        f'median {statistics.median(timings):.2f} ms, '
+                        f'min {min(timings):.2f} ms'
+                    )
+
+            transaction.set_rollback(True)
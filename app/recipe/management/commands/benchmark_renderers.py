@@ -0,0 +1,72 @@
+import io
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import FastJSONParser, FastJSONRenderer
+from recipe import serializers, views
+from recipe.management.commands.benchmark_queries import seed_recipes
+from recipe.management.commands.explain_queries import get_view_queryset
+
+
+def median_time(func, repeat):
+    """ Return the median duration in seconds of calling func """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    """ Django command to compare the JSON renderers and parsers on
+    recipe list payloads """
+    help = 'Time rendering and parsing recipe list payloads with the ' \
+           'stdlib json and the fast JSON classes, on generated data ' \
+           'which is rolled back'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument('--names', type=int, default=50,
+                            help='Tags and ingreedients to create')
+        parser.add_argument('--per-recipe', type=int, default=5,
+                            help='Tags and ingreedients of each recipe')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        """ Handling custom commands """
+        with transaction.atomic():
+            user = seed_recipes(options['recipes'], options['names'],
+                                options['per_recipe'])
+            recipes = get_view_queryset(views.RecipeViewSet, user, 'list',
+                                        paginate=False)
+            data = serializers.RecipeReadSerializer(recipes, many=True).data
+            transaction.set_rollback(True)
+
+        body = JSONRenderer().render(data)
+        self.stdout.write(f'{len(data)} recipes, {len(body):,} bytes')
+
+        for renderer in (JSONRenderer(), FastJSONRenderer()):
+            seconds = median_time(lambda: renderer.render(data),
+                                  options['repeat'])
+            self.stdout.write(
+                f'render, {type(renderer).__name__}: '
+                f'{seconds * 1000:.1f} ms, '
+                f'{len(body) / seconds / 2 ** 20:.1f} MB/s'
+            )
+
+        for parser in (JSONParser(), FastJSONParser()):
+            seconds = median_time(
+                lambda: parser.parse(io.BytesIO(body)), options['repeat']
+            )
+            self.stdout.write(
+                f'parse, {type(parser).__name__}: '
+                f'{seconds * 1000:.1f} ms, '
+                f'{len(body) / seconds / 2 ** 20:.1f} MB/s'
+            )
@@ -0,0 +1,61 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipe import serializers, views
+from recipe.management.commands.benchmark_queries import seed_recipes
+from recipe.management.commands.explain_queries import get_view_queryset
+
+
+def time_serializer(serializer_class, instances, repeat):
+    """ Return the timings in seconds of serializing instances """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        serializer_class(instances, many=True).data
+        timings.append(time.perf_counter() - start)
+
+    return timings
+
+
+class Command(BaseCommand):
+    """ Django command to compare the recipe serializers with their read
+    only fast paths on generated data """
+    help = 'Report the recipes serialized per second by the list and ' \
+           'detail serializers, on generated data which is rolled back'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--names', type=int, default=50,
+                            help='Tags and ingreedients to create')
+        parser.add_argument('--per-recipe', type=int, default=5,
+                            help='Tags and ingreedients of each recipe')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        """ Handling custom commands """
+        with transaction.atomic():
+            user = seed_recipes(options['recipes'], options['names'],
+                                options['per_recipe'])
+
+            for action, pairs in (
+                ('list', (serializers.RecipeSerializer,
+                          serializers.RecipeReadSerializer)),
+                ('retrieve', (serializers.RecipeDetailSerializer,
+                              serializers.RecipeDetailReadSerializer)),
+            ):
+                recipes = list(get_view_queryset(
+                    views.RecipeViewSet, user, action, paginate=False
+                ))
+                for serializer_class in pairs:
+                    timings = time_serializer(serializer_class, recipes,
+                                              options['repeat'])
+                    rate = len(recipes) / statistics.median(timings)
+                    self.stdout.write(
+                        f'{action}, {serializer_class.__name__}: '
+                        f'{rate:,.0f} recipes/s'
+                    )
+
+            transaction.set_rollback(True)
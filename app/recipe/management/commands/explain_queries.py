@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpRequest, QueryDict
+from rest_framework.request import Request
+
+from recipe import views
+
+
+def get_view_queryset(viewset, user, action, params=None, paginate=True):
+    """ Build the queryset a viewset action runs for the user, limited
+    to the first page of lists unless paginate is off """
+    http_request = HttpRequest()
+    http_request.GET = QueryDict(mutable=True)
+    http_request.GET.update(params or {})
+    request = Request(http_request)
+    request.user = user
+
+    view = viewset(request=request, action=action, format_kwarg=None,
+                   kwargs={})
+    queryset = view.get_queryset()
+
+    if paginate and action == 'list' and view.paginator is not None:
+        paginator = view.paginator
+        ordering = paginator.get_ordering(request, queryset, view)
+        queryset = queryset.order_by(*ordering)[:paginator.page_size + 1]
+
+    return queryset
+
+
+class Command(BaseCommand):
+    """ Django command to print the query plans of the recipe
+    API endpoints """
+    help = 'Print EXPLAIN output for the queries of the recipe endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'email',
+            help='Email of the user whose data the queries run against'
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Execute the queries and include actual timings'
+        )
+
+    def get_endpoints(self, user):
+        """ Return (name, queryset) pairs for each endpoint query """
+        tag_ids = ','.join(
+            str(pk) for pk in user.tag_set.values_list('id', flat=True)[:3]
+        ) or '0'
+        ingd_ids = ','.join(
+            str(pk) for pk in
+            user.ingreedient_set.values_list('id', flat=True)[:3]
+        ) or '0'
+        recipe = user.recipe_set.only('id', 'title').first()
+
+        endpoints = [
+            ('recipe list', views.RecipeViewSet, 'list', {}),
+            ('recipe list by tags', views.RecipeViewSet, 'list',
+             {'tags': tag_ids}),
+            ('recipe list by ingreedient', views.RecipeViewSet, 'list',
+             {'ingreedient': ingd_ids}),
+            ('recipe list by tags and ingreedient', views.RecipeViewSet,
+             'list', {'tags': tag_ids, 'ingreedient': ingd_ids,
+                      'match': 'all'}),
+            ('recipe search', views.RecipeViewSet, 'list',
+             {'search': recipe.title if recipe is not None else 'recipe'}),
+            ('tag list', views.TagViewSet, 'list', {}),
+            ('tag list assigned only', views.TagViewSet, 'list',
+             {'assigned_only': '1'}),
+            ('ingreedient list', views.IngreedientViewSet, 'list', {}),
+            ('ingreedient list assigned only', views.IngreedientViewSet,
+             'list', {'assigned_only': '1'}),
+        ]
+        for name, viewset, action, params in endpoints:
+            yield name, get_view_queryset(viewset, user, action, params)
+
+        if recipe is not None:
+            queryset = get_view_queryset(views.RecipeViewSet, user,
+                                         'retrieve')
+            yield 'recipe detail', queryset.filter(pk=recipe.pk)
+
+    def handle(self, *args, **options):
+        """ Handling custom commands """
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        explain_options = {'analyze': True} if options['analyze'] else {}
+        for name, queryset in self.get_endpoints(user):
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write('')
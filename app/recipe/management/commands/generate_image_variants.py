@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from core.models import Recipe
+from recipe import images
+
+
+class Command(BaseCommand):
+    """ Django command to write the derivatives recipe images are
+    missing, as do images uploaded before derivatives were generated and
+    those whose generation failed """
+    help = 'Generate the missing derivatives of recipe images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Regenerate the derivatives of every image')
+
+    def handle(self, *args, **options):
+        """ Handling custom commands """
+        expected = {
+            images.variant_key(width, fmt)
+            for width in settings.RECIPE_IMAGE_VARIANT_WIDTHS
+            for fmt in images.variant_formats()
+        }
+        recipes = Recipe.objects.exclude(Q(image='') | Q(image__isnull=True)) \
+            .order_by('pk').only('id', 'image', 'image_variant_keys')
+
+        generated = failed = 0
+        for recipe in recipes.iterator():
+            if not options['all'] and \
+                    expected <= set(recipe.image_variant_keys):
+                continue
+
+            name = recipe.image.name
+            try:
+                keys = images.generate_variants(name)
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f'Failed to generate derivatives of '
+                                  f'{name}: {exc}')
+                continue
+
+            images.record_variants(recipe.pk, name, keys)
+            generated += 1
+
+        self.stdout.write(f'Generated the derivatives of {generated} images, '
+                          f'{failed} failed')
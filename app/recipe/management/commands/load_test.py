@@ -0,0 +1,299 @@
+import io
+import json
+import platform
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.test.utils import override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from core.db import close_pool_connections
+from core.instrumentation import RequestProfile, current_profile
+from core.models import Tag, Recipe
+from core.seed import WORDS, Seeder
+from recipe import images
+
+HOST = 'localhost'
+
+SCENARIOS = ('recipe list', 'recipe filter', 'recipe search',
+             'recipe detail', 'tag list', 'ingreedient list', 'token',
+             'upload')
+
+
+def percentile(values, pct):
+    """ Return the nearest rank percentile of sorted values """
+    if not values:
+        return 0
+    rank = max(int(round(pct / 100 * len(values))), 1)
+    return values[rank - 1]
+
+
+def distribution(values):
+    """ Return the percentiles, mean and maximum of values """
+    values = sorted(values)
+    return {
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'mean': sum(values) / len(values) if values else 0,
+        'max': values[-1] if values else 0,
+    }
+
+
+def sample_image():
+    """ Return the bytes of a small JPEG """
+    image_file = io.BytesIO()
+    Image.new('RGB', (400, 300), (200, 120, 40)).save(image_file, 'JPEG')
+    return image_file.getvalue()
+
+
+class Target:
+    """ A seeded user with the ids their requests use """
+
+    def __init__(self, user, token, recipe_ids, tag_ids):
+        self.user = user
+        self.token = token
+        self.recipe_ids = recipe_ids
+        self.tag_ids = tag_ids
+
+
+class Command(BaseCommand):
+    """ Django command to measure the latency of the API endpoints under
+    concurrent clients on seeded data """
+    help = 'Seed users with tags, ingreedients and recipes, send ' \
+           'concurrent requests to each endpoint and write the latency ' \
+           'percentiles and queries per request as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--recipes', type=int, default=100,
+                            help='Recipes of each user')
+        parser.add_argument('--names', type=int, default=20,
+                            help='Tags and ingreedients of each user')
+        parser.add_argument('--per-recipe', type=int, default=3,
+                            help='Tags and ingreedients of each recipe')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Seed of the generated data and requests')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests sent for each scenario')
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help='Clients sending requests at once')
+        parser.add_argument('--scenario', action='append',
+                            choices=SCENARIOS,
+                            help='Scenario to run, all by default')
+        parser.add_argument('--label', default='',
+                            help='Name of the run, such as a release')
+        parser.add_argument('--output', default='-',
+                            help='File to write the JSON results to')
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the seeded data')
+
+    def seed(self, options):
+        """ Seed the users and return a target per user """
+        self.password = self.seeder.password
+        # Left by an interrupted run
+        self.seeder.clear()
+        self.seeder.seed(options['users'], options['names'],
+                         options['names'], options['recipes'],
+                         options['per_recipe'])
+        users = list(self.seeder.seeded_users().order_by('id'))
+        tokens = dict(Token.objects.filter(user__in=users)
+                      .values_list('user_id', 'key'))
+
+        return [
+            Target(
+                user, tokens[user.id],
+                list(Recipe.objects.filter(user=user)
+                     .values_list('id', flat=True)[:100]),
+                list(Tag.objects.filter(user=user)
+                     .values_list('id', flat=True)),
+            )
+            for user in users
+        ]
+
+    def build_request(self, scenario, target, rng):
+        """ Return the method, path, query, body and content type of a
+        request of scenario """
+        if scenario == 'recipe list':
+            return 'GET', reverse('recipe:recipe-list'), {}, b'', ''
+        if scenario == 'recipe filter':
+            tags = rng.sample(target.tag_ids, min(2, len(target.tag_ids)))
+            return 'GET', reverse('recipe:recipe-list'), {
+                'tags': ','.join(map(str, tags)),
+            }, b'', ''
+        if scenario == 'recipe search':
+            return 'GET', reverse('recipe:recipe-list'), {
+                'search': rng.choice(WORDS),
+            }, b'', ''
+        if scenario == 'recipe detail':
+            return 'GET', reverse('recipe:recipe-detail', args=[
+                rng.choice(target.recipe_ids)
+            ]), {}, b'', ''
+        if scenario == 'tag list':
+            return 'GET', reverse('recipe:tag-list'), {
+                'assigned_only': 1,
+            }, b'', ''
+        if scenario == 'ingreedient list':
+            return 'GET', reverse('recipe:ingreedient-list'), {
+                'assigned_only': 1,
+            }, b'', ''
+        if scenario == 'token':
+            body = urlencode({'email': target.user.email,
+                              'password': self.password})
+            return 'POST', reverse('user:token'), {}, body.encode(), \
+                'application/x-www-form-urlencoded'
+
+        return 'POST', reverse('recipe:recipe-upload-image', args=[
+            rng.choice(target.recipe_ids)
+        ]), {}, self.upload_body, MULTIPART_CONTENT
+
+    def send(self, handler, scenario, target, index, rng):
+        """ Send one request and return its latency, success and query
+        count """
+        method, path, query, body, content_type = self.build_request(
+            scenario, target, rng
+        )
+        # Part of every query string, so no request is answered from
+        # the response cache
+        query['request'] = f'{self.run_id}-{index}'
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': urlencode(query),
+            'SERVER_NAME': HOST,
+            'SERVER_PORT': '80',
+            'HTTP_HOST': HOST,
+            'CONTENT_TYPE': content_type,
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.url_scheme': 'http',
+            'wsgi.errors': io.StringIO(),
+        }
+        if scenario != 'token':
+            environ['HTTP_AUTHORIZATION'] = f'Token {target.token}'
+
+        statuses = []
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        try:
+            start = time.perf_counter()
+            response = handler(environ, lambda status, headers:
+                               statuses.append(status))
+            b''.join(response)
+            response.close()
+            latency = time.perf_counter() - start
+        finally:
+            current_profile.reset(token)
+
+        return latency, statuses[0][:3] == '200', profile.sql_count
+
+    def run(self, scenario, targets, options):
+        """ Send the requests of a scenario and return its results """
+        handler = WSGIHandler()
+        rng = random.Random(f'{options["seed"]}-{scenario}')
+        requests = [(rng.choice(targets), index, random.Random(rng.random()))
+                    for index in range(options['requests'])]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(
+                lambda request: self.send(handler, scenario, *request),
+                requests
+            ))
+            elapsed = time.perf_counter() - start
+            close_pool_connections(pool, options['concurrency'])
+
+        latencies = [latency * 1000 for latency, _, _ in results]
+        return {
+            'requests': len(results),
+            'errors': sum(1 for _, ok, _ in results if not ok),
+            'throughput': len(results) / elapsed,
+            'latency_ms': distribution(latencies),
+            'queries_per_request': distribution(
+                [queries for _, _, queries in results]
+            ),
+        }
+
+    def wait_for_images(self, timeout=60):
+        """ Wait for the derivatives of the uploads to be written """
+        deadline = time.monotonic() + timeout
+        while images.queue_depth() and time.monotonic() < deadline:
+            time.sleep(0.1)
+
+    def handle(self, *args, **options):
+        """ Handling custom commands """
+        scenarios = options['scenario'] or SCENARIOS
+        self.run_id = int(time.time())
+        self.upload_body = encode_multipart(
+            BOUNDARY, {'image': io.BytesIO(sample_image())}
+        )
+        media_root = tempfile.mkdtemp()
+        started_at = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
+        self.seeder = Seeder(prefix=f'load-test-{options["seed"]}',
+                             seed=options['seed'])
+        started = time.perf_counter()
+        targets = self.seed(options)
+        seconds = time.perf_counter() - started
+        self.stderr.write(f'Seeded {len(targets)} users in {seconds:.1f}s')
+
+        results = {}
+        try:
+            # The profiles of the requests are read here rather than
+            # logged by PerformanceMiddleware
+            with override_settings(ALLOWED_HOSTS=[HOST],
+                                   MEDIA_ROOT=media_root,
+                                   PERF_SAMPLE_RATE=0):
+                for scenario in scenarios:
+                    results[scenario] = self.run(scenario, targets,
+                                                 options)
+                    self.stderr.write(
+                        f'{scenario}: {results[scenario]["throughput"]:.1f}'
+                        f' req/s, p95 '
+                        f'{results[scenario]["latency_ms"]["p95"]:.1f} ms, '
+                        f'{results[scenario]["errors"]} errors'
+                    )
+                self.wait_for_images()
+        finally:
+            images.pool.close_connections()
+            shutil.rmtree(media_root, ignore_errors=True)
+            if not options['keep']:
+                self.seeder.clear()
+
+        report = {
+            'label': options['label'],
+            'started': started_at,
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': f'{connection.vendor} '
+                            f'{connection.pg_version}',
+                'conn_max_age': settings.DATABASES['default'].get(
+                    'CONN_MAX_AGE'
+                ),
+                'fast_json': settings.API_FAST_JSON,
+            },
+            'options': {name: options[name] for name in (
+                'users', 'recipes', 'names', 'per_recipe', 'seed',
+                'requests', 'concurrency',
+            )},
+            'scenarios': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(output)
+        else:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output + '\n')
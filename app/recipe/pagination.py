@@ -0,0 +1,97 @@
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, \
+    LimitOffsetPagination
+from rest_framework.response import Response
+
+from recipe.params import get_search
+
+
+class OffsetPagination(LimitOffsetPagination):
+    """ Offset pagination with the page size parameter and response of
+    the cursor pages, telling whether there is a next page by reading
+    one more row instead of counting every row """
+    default_limit = settings.API_PAGE_SIZE
+    limit_query_param = 'page_size'
+    max_limit = settings.API_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        self.request = request
+        page = list(queryset[self.offset:self.offset + self.limit + 1])
+        # Rows up to the end of the page, and one more if there is a
+        # next page, as get_next_link compares it with the page end
+        self.count = self.offset + len(page)
+
+        return page[:self.limit]
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class BaseCursorPagination(CursorPagination):
+    """ Keyset pagination with a page size the client can lower
+    or raise up to a cap """
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    # Ordering used instead when the search query parameter is given
+    search_ordering = None
+    # Orderings the client can pick with the ordering query parameter
+    ordering_param = 'ordering'
+    orderings = {}
+    # Orderings paginated by offset: a cursor on their first field, which
+    # is not unique and changes as objects are edited, would skip or
+    # repeat objects
+    offset_orderings = ()
+
+    def get_ordering(self, request, queryset, view):
+        """ Return the search ordering for searches, else the ordering
+        requested by the client or the default one """
+        if self.search_ordering and get_search(request):
+            return self.search_ordering
+
+        requested = request.query_params.get(self.ordering_param)
+        if requested in self.orderings:
+            return self.orderings[requested]
+
+        return super().get_ordering(request, queryset, view)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """ Paginate by cursor, or by offset for the offset orderings """
+        self.offset_pagination = None
+        requested = request.query_params.get(self.ordering_param)
+        if requested in self.offset_orderings and \
+                not (self.search_ordering and get_search(request)):
+            self.offset_pagination = OffsetPagination()
+            ordering = self.get_ordering(request, queryset, view)
+            return self.offset_pagination.paginate_queryset(
+                queryset.order_by(*ordering), request, view
+            )
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.offset_pagination is not None:
+            return self.offset_pagination.get_paginated_response(data)
+
+        return super().get_paginated_response(data)
+
+
+class RecipeCursorPagination(BaseCursorPagination):
+    """ Paginate recipes newest first """
+    ordering = '-id'
+    search_ordering = ('-rank', '-id')
+
+
+class NameCursorPagination(BaseCursorPagination):
+    """ Paginate tags and ingreedients by name, or most used first """
+    ordering = ('-name', 'id')
+    orderings = {'popular': ('-recipe_count', 'id')}
+    offset_orderings = ('popular',)
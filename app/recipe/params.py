@@ -0,0 +1,21 @@
+# Query parameters holding comma separated ids
+ID_LIST_PARAMS = ('tags', 'ingreedient')
+
+
+def normalize_params(query_params):
+    """ Return the query parameters as a canonical string, so the order
+    and spacing of ids do not matter """
+    params = []
+    for name in sorted(query_params):
+        value = query_params.get(name)
+        if name in ID_LIST_PARAMS:
+            ids = sorted({part.strip() for part in value.split(',')})
+            value = ','.join(ids)
+        params.append(f'{name}={value}')
+
+    return '&'.join(params)
+
+
+def get_search(request):
+    """ Return the text of the search query parameter, if any """
+    return request.query_params.get('search', '').strip()
@@ -1,31 +1,65 @@
 from rest_framework import serializers
+from core.instrumentation import TimedSerializerMixin, timed
 from core.models import Tag, Ingreedient, Recipe
+from recipe.bulk import BulkListSerializer
+from recipe.fields import UserPrimaryKeyRelatedField
+from recipe.images import image_variant_urls
+from recipe.uploads import StoredImageUpload
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """ Serializer for tag object """
 
     class Meta:
         model = Tag
-        fields = ('id', 'name')
-        read_only_fields = ('id',)
+        fields = ('id', 'name', 'recipe_count')
+        read_only_fields = ('id', 'recipe_count')
+        list_serializer_class = BulkListSerializer
 
 
-class IngreedientSerializer(serializers.ModelSerializer):
+class IngreedientSerializer(TimedSerializerMixin,
+                            serializers.ModelSerializer):
     """ Serializers for ingreedient object """
     class Meta:
         model = Ingreedient
+        fields = ('id', 'name', 'recipe_count')
+        read_only_fields = ('id', 'recipe_count')
+        list_serializer_class = BulkListSerializer
+
+
+class RecipeTagSerializer(TagSerializer):
+    """ Serialize a tag inside a recipe, without the count that other
+    recipes change """
+
+    class Meta(TagSerializer.Meta):
         fields = ('id', 'name')
-        read_only_fields = ('id',)
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeIngreedientSerializer(IngreedientSerializer):
+    """ Serialize an ingreedient inside a recipe, without the count
+    that other recipes change """
+
+    class Meta(IngreedientSerializer.Meta):
+        fields = ('id', 'name')
+
+
+class ImageVariantsMixin(serializers.Serializer):
+    """ Expose the URLs of the resized derivatives of the image """
+    image_variants = serializers.SerializerMethodField()
+
+    def get_image_variants(self, obj):
+        """ Return the derivative URLs keyed by width and format """
+        return image_variant_urls(obj, self.context.get('request'))
+
+
+class RecipeSerializer(TimedSerializerMixin, ImageVariantsMixin,
+                       serializers.ModelSerializer):
     """ Serialize a recipe """
-    ingreedient = serializers.PrimaryKeyRelatedField(
+    ingreedient = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Ingreedient.objects.all()
     )
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
     )
@@ -33,21 +67,83 @@ class RecipeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
         fields = ('id', 'title', 'ingreedient', 'tags', 'time_miniutes',
-                  'price', 'link')
+                  'price', 'link', 'image_variants')
 
         read_only_fields = ('id',)
+        list_serializer_class = BulkListSerializer
 
 
 class RecipeDetailSerializer(RecipeSerializer):
     """ serialize a recipe detail """
-    ingreedient = IngreedientSerializer(many=True, read_only=True)
-    tags = TagSerializer(many=True, read_only=True)
+    ingreedient = RecipeIngreedientSerializer(many=True, read_only=True)
+    tags = RecipeTagSerializer(many=True, read_only=True)
 
 
-class RecipeImageUploadSerializer(serializers.ModelSerializer):
+class RecipeReadSerializer(serializers.BaseSerializer):
+    """ Read only fast path of RecipeSerializer, building the same
+    output without a field object per value. Expects the relations to
+    be prefetched """
+    price_field = serializers.DecimalField(
+        max_digits=Recipe._meta.get_field('price').max_digits,
+        decimal_places=Recipe._meta.get_field('price').decimal_places,
+    )
+
+    def to_relations(self, related):
+        """ Return the representation of prefetched related objects """
+        return [obj.pk for obj in related.all()]
+
+    def to_representation(self, instance):
+        """ Return the recipe as a dict """
+        with timed('serialize'):
+            return {
+                'id': instance.id,
+                'title': instance.title,
+                'ingreedient': self.to_relations(instance.ingreedient),
+                'tags': self.to_relations(instance.tags),
+                'time_miniutes': instance.time_miniutes,
+                'price': self.price_field.to_representation(instance.price),
+                'link': instance.link,
+                'image_variants': image_variant_urls(
+                    instance, self.context.get('request')
+                ),
+            }
+
+
+class RecipeDetailReadSerializer(RecipeReadSerializer):
+    """ Read only fast path of RecipeDetailSerializer """
+
+    def to_relations(self, related):
+        """ Return the id and name of prefetched related objects """
+        return [{'id': obj.id, 'name': obj.name} for obj in related.all()]
+
+
+class RecipeExportSerializer(serializers.BaseSerializer):
+    """ Recipe as exported, from the values of its columns and the names
+    of its tags and ingreedients """
+    price_field = RecipeReadSerializer.price_field
+
+    def to_representation(self, row):
+        """ Return the row with its price as in the rest of the API """
+        row['price'] = self.price_field.to_representation(row['price'])
+        return row
+
+
+class RecipeImageUploadSerializer(ImageVariantsMixin,
+                                  serializers.ModelSerializer):
     """ serializer for uploading images """
 
     class Meta:
         model = Recipe
-        fields = ('id', 'image')
+        fields = ('id', 'image', 'image_variants')
         read_only_fields = ('id',)
+
+    def update(self, instance, validated_data):
+        """ Point the recipe at an image that was already streamed to
+        its final location instead of copying it again """
+        image = validated_data.get('image')
+        if isinstance(image, StoredImageUpload):
+            validated_data['image'] = image.storage_name
+        # The derivatives of the new image are not written yet
+        validated_data['image_variant_keys'] = []
+
+        return super().update(instance, validated_data)
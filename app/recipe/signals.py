@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Tag, Ingreedient, Recipe
+from core.signals import bulk_deleting
+from recipe.cache import bump_data_version
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingreedient)
+@receiver(post_delete, sender=Ingreedient)
+def invalidate_owner_responses(sender, instance, **kwargs):
+    """ Invalidate the cached responses of the object's owner, once per
+    bulk delete by its caller """
+    if not bulk_deleting.get():
+        bump_data_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingreedient.through)
+def invalidate_relation_responses(sender, instance, action, **kwargs):
+    """ Invalidate the cached responses when recipes gain or lose
+    tags or ingreedients """
+    if action.startswith('post_'):
+        bump_data_version(instance.user_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_new_user_responses(sender, instance, created, **kwargs):
+    """ Make sure a new user never sees responses cached under a
+    reused id """
+    if created:
+        bump_data_version(instance.pk)
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.instrumentation import RequestProfile, current_profile
+from core.models import Recipe
+from recipe import views
+from recipe import async_views
+from recipe.async_views import async_read_view
+
+
+class AsyncReadViewTest(SimpleTestCase):
+    """ Test running sync views from async read views """
+
+    def setUp(self):
+        self.threads = []
+
+        def view(request):
+            self.threads.append(threading.current_thread().name)
+            return HttpResponse(request.method)
+
+        self.view = async_read_view(view)
+        self.factory = RequestFactory()
+
+    def test_reads_run_on_pool(self):
+        """ Test GET requests run on the read pool """
+        res = asyncio.run(self.view(self.factory.get('/')))
+
+        self.assertEqual(res.content, b'GET')
+        self.assertTrue(self.threads[0].startswith('async-reads'))
+
+    def test_reads_keep_request_context(self):
+        """ Test the pool runs reads with the profile of the request """
+        profiles = []
+        view = async_read_view(
+            lambda request: profiles.append(current_profile.get()) or
+            HttpResponse()
+        )
+        profile = RequestProfile()
+
+        async def profiled():
+            current_profile.set(profile)
+            return await view(self.factory.get('/'))
+
+        asyncio.run(profiled())
+
+        self.assertIs(profiles[0], profile)
+
+    def test_reads_mark_pool_connections(self):
+        """ Test the pool worker has its kept connections checked on
+        first use, request_started marking those of another thread """
+        marked = []
+        with patch.object(async_views, 'mark_kept_connections',
+                          lambda: marked.append(
+                              threading.current_thread().name)):
+            asyncio.run(self.view(self.factory.get('/')))
+
+        self.assertEqual(marked, self.threads)
+
+    def test_writes_not_on_pool(self):
+        """ Test other methods are not run on the read pool """
+        res = asyncio.run(self.view(self.factory.post('/')))
+
+        self.assertEqual(res.content, b'POST')
+        self.assertFalse(self.threads[0].startswith('async-reads'))
+
+
+class AsyncRecipeListTest(TransactionTestCase):
+    """ Test the recipe list as an async read view """
+
+    def tearDown(self):
+        async_views.pool.close_connections()
+
+    def test_list_recipes(self):
+        """ Test the rendered list is returned from the pool """
+        user = get_user_model().objects.create_user('async@theesh.com',
+                                                    'testpass')
+        Recipe.objects.create(user=user, title='Pancake',
+                              time_miniutes=10, price=5.00)
+        request = APIRequestFactory().get('/api/recipe/recipe/')
+        force_authenticate(request, user)
+        view = async_read_view(
+            views.RecipeViewSet.as_view({'get': 'list'}, basename='recipe')
+        )
+
+        res = asyncio.run(view(request))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['results'][0]['title'], 'Pancake')
+        self.assertTrue(res.is_rendered)
@@ -0,0 +1,249 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingreedient, Recipe
+
+RECIPE_BULK_URL = reverse('recipe:recipe-bulk')
+TAG_BULK_URL = reverse('recipe:tag-bulk')
+INGREEDIENT_BULK_URL = reverse('recipe:ingreedient-bulk')
+
+
+def recipe_payload(**params):
+    """ Return a payload for a new recipe """
+    defaults = {
+        'title': 'Sample recipe',
+        'time_miniutes': 10,
+        'price': '5.00',
+        'tags': [],
+        'ingreedient': [],
+    }
+    defaults.update(params)
+
+    return defaults
+
+
+class BulkApiTest(TestCase):
+    """ Test the bulk create, update and delete endpoints """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'bulk@theesh.com',
+            'testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.ingreedient = Ingreedient.objects.create(
+            user=self.user,
+            name='Salt'
+        )
+
+    def test_bulk_create_recipes(self):
+        """ Test creating recipes with their relations in one request """
+        payload = [
+            recipe_payload(title='Curry', tags=[self.tag.id],
+                           ingreedient=[self.ingreedient.id]),
+            recipe_payload(title='Soup', tags=[self.tag.id]),
+        ]
+
+        res = self.client.post(RECIPE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        ids = [result['id'] for result in res.data['results']]
+        curry, soup = [Recipe.objects.get(id=pk) for pk in ids]
+        self.assertEqual(curry.title, 'Curry')
+        self.assertEqual(curry.user, self.user)
+        self.assertEqual(list(curry.tags.all()), [self.tag])
+        self.assertEqual(list(curry.ingreedient.all()), [self.ingreedient])
+        self.assertEqual(list(soup.tags.all()), [self.tag])
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 2)
+
+    def test_bulk_create_query_count(self):
+        """ Test the validation and writes do not grow with the number of
+        items """
+        queries = []
+        for count in (2, 20):
+            payload = [recipe_payload(tags=[self.tag.id],
+                                      ingreedient=[self.ingreedient.id])
+                       for _ in range(count)]
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.post(RECIPE_BULK_URL, payload,
+                                       format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            queries.append(len(ctx))
+
+        self.assertEqual(queries[0], queries[1])
+        self.assertEqual(Recipe.objects.count(), 22)
+        self.assertEqual(self.tag.recipe_set.count(), 22)
+
+    def test_bulk_create_missing_relations(self):
+        """ Test related ids missing from the batch are reported on the
+        items sending them """
+        other = get_user_model().objects.create_user('other@theesh.com')
+        foreign = Tag.objects.create(user=other, name='Theirs')
+        payload = [
+            recipe_payload(tags=[self.tag.id]),
+            recipe_payload(tags=[foreign.id, 'x']),
+            recipe_payload(tags=[foreign.id]),
+        ]
+
+        res = self.client.post(RECIPE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        statuses = [result['status'] for result in res.data['results']]
+        self.assertEqual(statuses, [424, 400, 400])
+        self.assertIn('tags', res.data['results'][2]['errors'])
+
+    def test_bulk_create_invalid_rejects_all(self):
+        """ Test one invalid item rejects the whole batch """
+        payload = [recipe_payload(), recipe_payload(title='')]
+
+        res = self.client.post(RECIPE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        statuses = [result['status'] for result in res.data['results']]
+        self.assertEqual(statuses, [424, 400])
+        self.assertIn('title', res.data['results'][1]['errors'])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_tags_and_ingreedients(self):
+        """ Test tags and ingreedients are created for the user """
+        for url, model in ((TAG_BULK_URL, Tag),
+                           (INGREEDIENT_BULK_URL, Ingreedient)):
+            payload = [{'name': 'One'}, {'name': 'Two'}]
+            res = self.client.post(url, payload, format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(
+                model.objects.filter(user=self.user,
+                                     name__in=['One', 'Two']).count(),
+                2
+            )
+
+    def test_bulk_update_recipes(self):
+        """ Test partially updating recipes and replacing relations """
+        recipe1 = Recipe.objects.create(user=self.user, title='Curry',
+                                        time_miniutes=5, price=5)
+        recipe2 = Recipe.objects.create(user=self.user, title='Soup',
+                                        time_miniutes=5, price=5)
+        recipe1.tags.add(self.tag)
+        new_tag = Tag.objects.create(user=self.user, name='Spicy')
+        payload = [
+            {'id': recipe1.id, 'tags': [new_tag.id]},
+            {'id': recipe2.id, 'title': 'Stew'},
+        ]
+
+        res = self.client.patch(RECIPE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe1.refresh_from_db()
+        recipe2.refresh_from_db()
+        self.assertEqual(list(recipe1.tags.all()), [new_tag])
+        self.assertEqual(recipe1.title, 'Curry')
+        self.tag.refresh_from_db()
+        new_tag.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 0)
+        self.assertEqual(new_tag.recipe_count, 1)
+        self.assertEqual(recipe2.title, 'Stew')
+
+    def test_bulk_update_other_users_recipe(self):
+        """ Test recipes of other users can not be updated """
+        user2 = get_user_model().objects.create_user(
+            'bulk2@theesh.com',
+            'testpass'
+        )
+        recipe = Recipe.objects.create(user=user2, title='Curry',
+                                       time_miniutes=5, price=5)
+
+        res = self.client.patch(RECIPE_BULK_URL,
+                                [{'id': recipe.id, 'title': 'Mine'}],
+                                format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Curry')
+
+    def test_bulk_update_tag_visible_in_recipe(self):
+        """ Test renaming tags in bulk invalidates recipe details """
+        recipe = Recipe.objects.create(user=self.user, title='Curry',
+                                       time_miniutes=5, price=5)
+        recipe.tags.add(self.tag)
+        url = reverse('recipe:recipe-detail', args=[recipe.id])
+        etag = self.client.get(url)['ETag']
+
+        self.client.patch(TAG_BULK_URL, [{'id': self.tag.id, 'name': 'Raw'}],
+                          format='json')
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tags'][0]['name'], 'Raw')
+
+    def test_bulk_delete(self):
+        """ Test deleting listed ids and reporting missing ones """
+        recipe = Recipe.objects.create(user=self.user, title='Curry',
+                                       time_miniutes=5, price=5)
+
+        res = self.client.delete(RECIPE_BULK_URL, [recipe.id, 0],
+                                 format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        statuses = [result['status'] for result in res.data['results']]
+        self.assertEqual(statuses, [204, 404])
+        self.assertFalse(Recipe.objects.filter(id=recipe.id).exists())
+
+    def test_bulk_delete_query_count(self):
+        """ Test deleting recipes recounts their tags and ingreedients with
+        queries that do not grow with the number of items """
+        queries = []
+        for count in (2, 20):
+            recipes = []
+            for i in range(count):
+                recipe = Recipe.objects.create(user=self.user, title=str(i),
+                                               time_miniutes=5, price=5)
+                recipe.tags.add(self.tag)
+                recipe.ingreedient.add(self.ingreedient)
+                recipes.append(recipe.id)
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.delete(RECIPE_BULK_URL, recipes,
+                                         format='json')
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            queries.append(len(ctx))
+
+        self.assertEqual(queries[0], queries[1])
+        self.assertFalse(Recipe.objects.exists())
+        self.tag.refresh_from_db()
+        self.ingreedient.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 0)
+        self.assertEqual(self.ingreedient.recipe_count, 0)
+
+    def test_bulk_delete_tags_touches_recipes(self):
+        """ Test deleting tags marks the recipes showing them as
+        modified """
+        recipe = Recipe.objects.create(user=self.user, title='Curry',
+                                       time_miniutes=5, price=5)
+        recipe.tags.add(self.tag)
+        modified = Recipe.objects.get(id=recipe.id).updated_at
+
+        res = self.client.delete(TAG_BULK_URL, [self.tag.id], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(Tag.objects.exists())
+        recipe.refresh_from_db()
+        self.assertGreater(recipe.updated_at, modified)
+        self.assertFalse(recipe.tags.exists())
+
+    @override_settings(API_MAX_BULK_SIZE=2)
+    def test_bulk_size_limited(self):
+        """ Test batches over the limit are rejected """
+        payload = [{'name': str(i)} for i in range(3)]
+
+        res = self.client.post(TAG_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Tag.objects.count(), 1)
@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.http import QueryDict
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingreedient, Recipe
+from recipe.cache import get_data_version
+from recipe.params import normalize_params
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAG_URL = reverse('recipe:tag-list')
+INGREEDIENTS_URL = reverse('recipe:ingreedient-list')
+
+
+def detail_url(recipe_id):
+    """ Return recipe detail url """
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class ResponseCacheTest(TestCase):
+    """ Test caching the recipe read endpoints """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'cache@theesh.com',
+            'testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Pancake',
+            time_miniutes=10,
+            price=5.00
+        )
+
+    def test_warm_reads_skip_database(self):
+        """ Test repeated reads are served without queries """
+        for url in (RECIPE_URL, TAG_URL, INGREEDIENTS_URL,
+                    detail_url(self.recipe.id)):
+            res = self.client.get(url)
+            with self.assertNumQueries(0):
+                cached = self.client.get(url)
+
+            self.assertEqual(cached.status_code, status.HTTP_200_OK)
+            self.assertEqual(cached.data, res.data)
+
+    def test_write_invalidates(self):
+        """ Test creating an object is visible on the next read """
+        self.client.get(TAG_URL)
+        Tag.objects.create(user=self.user, name='Sweet')
+
+        res = self.client.get(TAG_URL)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_relation_change_invalidates(self):
+        """ Test adding a tag to a recipe is visible in its detail """
+        url = detail_url(self.recipe.id)
+        self.client.get(url)
+        version = get_data_version(self.user.pk)
+
+        tag = Tag.objects.create(user=self.user, name='Sweet')
+        self.recipe.tags.add(tag)
+
+        self.assertNotEqual(get_data_version(self.user.pk), version)
+        res = self.client.get(url)
+        self.assertEqual(res.data['tags'], [{'id': tag.id, 'name': tag.name}])
+
+    def test_other_users_writes_keep_cache(self):
+        """ Test another user's writes do not invalidate the cache """
+        self.client.get(RECIPE_URL)
+        user2 = get_user_model().objects.create_user(
+            'cache2@theesh.com',
+            'testpass'
+        )
+        Ingreedient.objects.create(user=user2, name='Salt')
+
+        with self.assertNumQueries(0):
+            self.client.get(RECIPE_URL)
+
+    def test_scheme_in_key(self):
+        """ Test the absolute URLs of a response cached over http are not
+        served over https """
+        Recipe.objects.create(user=self.user, title='Soup',
+                              time_miniutes=10, price=5.00)
+
+        res = self.client.get(RECIPE_URL, {'page_size': 1})
+        self.assertTrue(res.data['next'].startswith('http://'))
+
+        res = self.client.get(RECIPE_URL, {'page_size': 1}, secure=True)
+        self.assertTrue(res.data['next'].startswith('https://'))
+
+    def test_query_params_normalized(self):
+        """ Test the order of filter ids does not change the key """
+        self.assertEqual(
+            normalize_params(QueryDict('tags=2, 1&page_size=5')),
+            normalize_params(QueryDict('page_size=5&tags=1,2'))
+        )
+        self.assertNotEqual(
+            normalize_params(QueryDict('tags=1')),
+            normalize_params(QueryDict('ingreedient=1'))
+        )
@@ -0,0 +1,191 @@
+import io
+import json
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase, override_settings
+from PIL import Image
+
+from core.models import Tag, Ingreedient, Recipe
+from recipe import images
+
+
+class ExplainQueriesCommandTest(TestCase):
+    """ Test the explain_queries command """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'explain@theesh.com',
+            'testpass'
+        )
+
+    def test_explain_all_endpoints(self):
+        """ Test a plan is printed for every endpoint query """
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Pancake',
+            time_miniutes=10,
+            price=5.00
+        )
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Sweet'))
+        recipe.ingreedient.add(
+            Ingreedient.objects.create(user=self.user, name='Flour')
+        )
+        out = StringIO()
+
+        call_command('explain_queries', self.user.email, stdout=out)
+
+        output = out.getvalue()
+        for name in ('recipe list by tags', 'tag list assigned only',
+                     'ingreedient list', 'recipe detail'):
+            self.assertIn(name, output)
+
+    def test_explain_unknown_user(self):
+        """ Test an unknown email is reported as an error """
+        with self.assertRaises(CommandError):
+            call_command('explain_queries', 'nobody@theesh.com')
+
+
+class BenchmarkQueriesCommandTest(TestCase):
+    """ Test the benchmark_queries command """
+
+    def test_benchmark_rolled_back(self):
+        """ Test timings are printed and the data is removed """
+        out = StringIO()
+
+        call_command('benchmark_queries', recipes=10, names=3, repeat=2,
+                     stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('tags assigned only, exists', output)
+        self.assertIn('ingreedients assigned only, join + distinct', output)
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(get_user_model().objects.exists())
+
+
+class BenchmarkAsgiCommandTest(TransactionTestCase):
+    """ Test the benchmark_asgi command """
+
+    def test_benchmark_all_servers(self):
+        """ Test every server answers and the data is removed """
+        out = StringIO()
+
+        call_command('benchmark_asgi', requests=4, concurrency=2,
+                     threads=2, query_delay=0, recipes=2, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        for line in lines:
+            self.assertIn(' 0 errors', line)
+        self.assertFalse(get_user_model().objects.exists())
+
+
+class BenchmarkSerializersCommandTest(TestCase):
+    """ Test the benchmark_serializers command """
+
+    def test_benchmark_rolled_back(self):
+        """ Test a rate is printed for each serializer and the data is
+        removed """
+        out = StringIO()
+
+        call_command('benchmark_serializers', recipes=10, names=3,
+                     per_recipe=2, repeat=1, stdout=out)
+
+        output = out.getvalue()
+        for name in ('list, RecipeSerializer', 'list, RecipeReadSerializer',
+                     'retrieve, RecipeDetailReadSerializer'):
+            self.assertIn(name, output)
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(get_user_model().objects.exists())
+
+
+class BenchmarkRenderersCommandTest(TestCase):
+    """ Test the benchmark_renderers command """
+
+    def test_benchmark_rolled_back(self):
+        """ Test a timing is printed for each class and the data is
+        removed """
+        out = StringIO()
+
+        call_command('benchmark_renderers', recipes=10, names=3,
+                     per_recipe=2, repeat=1, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('10 recipes', output)
+        for name in ('render, JSONRenderer', 'render, FastJSONRenderer',
+                     'parse, JSONParser', 'parse, FastJSONParser'):
+            self.assertIn(name, output)
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(get_user_model().objects.exists())
+
+
+class LoadTestCommandTest(TransactionTestCase):
+    """ Test the load_test command """
+
+    def test_load_test_results(self):
+        """ Test the results are written as JSON and the data removed """
+        with tempfile.NamedTemporaryFile('r', suffix='.json') as output:
+            call_command('load_test', users=2, recipes=3, names=3,
+                         per_recipe=2, requests=4, concurrency=2,
+                         scenario=['recipe list', 'token', 'upload'],
+                         output=output.name, stderr=StringIO())
+            results = json.load(output)
+
+        self.assertEqual(list(results['scenarios']),
+                         ['recipe list', 'token', 'upload'])
+        for scenario in results['scenarios'].values():
+            self.assertEqual(scenario['requests'], 4)
+            self.assertEqual(scenario['errors'], 0)
+            self.assertIn('p99', scenario['latency_ms'])
+        self.assertGreater(
+            results['scenarios']['recipe list']['queries_per_request']['p50'],
+            0
+        )
+        self.assertFalse(get_user_model().objects.exists())
+
+
+@override_settings(RECIPE_IMAGE_VARIANT_WIDTHS=(320,),
+                   RECIPE_IMAGE_VARIANT_FORMATS=('jpeg',))
+class GenerateImageVariantsCommandTest(TestCase):
+    """ Test the generate_image_variants command """
+
+    def setUp(self):
+        user = get_user_model().objects.create_user('variants@theesh.com')
+        buffer = io.BytesIO()
+        Image.new('RGB', (400, 200)).save(buffer, format='PNG')
+        self.name = default_storage.save('upload/recipe/backfill.png',
+                                         ContentFile(buffer.getvalue()))
+        self.addCleanup(default_storage.delete, self.name)
+        self.addCleanup(images.delete_variants, self.name)
+        self.missing = Recipe.objects.create(user=user, title='Old',
+                                             time_miniutes=5, price=5,
+                                             image=self.name)
+        self.broken = Recipe.objects.create(user=user, title='Broken',
+                                            time_miniutes=5, price=5,
+                                            image='upload/recipe/gone.png')
+        Recipe.objects.create(user=user, title='No image', time_miniutes=5,
+                              price=5)
+
+    def test_backfill(self):
+        """ Test derivatives are written and recorded for images missing
+        them, failures being reported """
+        out, err = StringIO(), StringIO()
+
+        call_command('generate_image_variants', stdout=out, stderr=err)
+
+        self.missing.refresh_from_db()
+        self.assertEqual(self.missing.image_variant_keys, ['320w_jpeg'])
+        self.assertTrue(default_storage.exists(
+            images.variant_name(self.name, 320, 'jpeg')
+        ))
+        self.assertIn('1 images, 1 failed', out.getvalue())
+        self.assertIn('gone.png', err.getvalue())
+
+        out = StringIO()
+        call_command('generate_image_variants', stdout=out, stderr=err)
+        self.assertIn('0 images', out.getvalue())
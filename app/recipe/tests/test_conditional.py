@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Recipe
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAG_URL = reverse('recipe:tag-list')
+
+
+def detail_url(recipe_id):
+    """ Return recipe detail url """
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class ConditionalGetTest(TestCase):
+    """ Test ETag and Last-Modified on the recipe endpoints """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'etag@theesh.com',
+            'testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Pancake',
+            time_miniutes=10,
+            price=5.00
+        )
+        self.tag = Tag.objects.create(user=self.user, name='Sweet')
+
+    def test_validators_returned(self):
+        """ Test read responses carry ETag and Last-Modified """
+        for url in (RECIPE_URL, TAG_URL, detail_url(self.recipe.id)):
+            res = self.client.get(url)
+            self.assertTrue(res['ETag'].startswith('"'))
+            self.assertIn('Last-Modified', res)
+
+    def test_if_none_match_not_modified(self):
+        """ Test a matching If-None-Match returns an empty 304 """
+        for url in (RECIPE_URL, TAG_URL, detail_url(self.recipe.id)):
+            etag = self.client.get(url)['ETag']
+
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(res.content, b'')
+            self.assertEqual(res['ETag'], etag)
+
+    def test_not_modified_before_cached(self):
+        """ Test a 304 is answered with a single query and no
+        serialization on a cold cache """
+        etag = self.client.get(RECIPE_URL)['ETag']
+        Tag.objects.create(user=self.user, name='Unrelated')
+
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_change_modifies_etag(self):
+        """ Test a change to the data gives a new ETag """
+        etag = self.client.get(RECIPE_URL)['ETag']
+        self.recipe.title = 'Crepe'
+        self.recipe.save()
+
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_relation_change_modifies_detail_etag(self):
+        """ Test adding or renaming a tag changes the detail ETag """
+        url = detail_url(self.recipe.id)
+        etag = self.client.get(url)['ETag']
+
+        self.recipe.tags.add(self.tag)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        etag = res['ETag']
+        self.tag.name = 'Savoury'
+        self.tag.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tags'][0]['name'], 'Savoury')
+
+    def test_delete_modifies_list_etag(self):
+        """ Test deleting an object changes the list ETag """
+        Tag.objects.create(user=self.user, name='Salty')
+        etag = self.client.get(TAG_URL)['ETag']
+        self.tag.delete()
+
+        res = self.client.get(TAG_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_unknown_recipe_not_found(self):
+        """ Test conditional requests for missing recipes return 404 """
+        res = self.client.get(detail_url(0), HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
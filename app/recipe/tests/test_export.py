@@ -0,0 +1,181 @@
+import asyncio
+import csv
+import io
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingreedient, Recipe
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+def sample_recipe(user, title, **params):
+    """ Create and return a sample recipe """
+    defaults = {
+        'time_miniutes': 10,
+        'price': 5.00,
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, title=title, **defaults)
+
+
+def read(response):
+    """ Return the streamed body of response as text """
+    return b''.join(response.streaming_content).decode()
+
+
+class RecipeExportTest(TestCase):
+    """ Test the streaming recipe export """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'export@theesh.com',
+            'testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_login_required(self):
+        """ Test the export needs authentication """
+        res = APIClient().get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_export_ndjson(self):
+        """ Test recipes are streamed as a JSON object per line with the
+        names of their relations """
+        curry = sample_recipe(self.user, 'Curry', link='https://curry')
+        curry.tags.add(Tag.objects.create(user=self.user, name='Vegan'),
+                       Tag.objects.create(user=self.user, name='Spicy'))
+        curry.ingreedient.add(
+            Ingreedient.objects.create(user=self.user, name='Rice')
+        )
+        soup = sample_recipe(self.user, 'Soup')
+        other = get_user_model().objects.create_user('other@theesh.com')
+        sample_recipe(other, 'Not mine')
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'],
+                         'application/x-ndjson; charset=utf-8')
+        self.assertIn('recipes.ndjson', res['Content-Disposition'])
+        rows = [json.loads(line) for line in read(res).splitlines()]
+        self.assertEqual(rows, [
+            {'id': curry.id, 'title': 'Curry', 'time_miniutes': 10,
+             'price': '5.00', 'link': 'https://curry',
+             'tags': ['Spicy', 'Vegan'], 'ingreedient': ['Rice']},
+            {'id': soup.id, 'title': 'Soup', 'time_miniutes': 10,
+             'price': '5.00', 'link': '', 'tags': [], 'ingreedient': []},
+        ])
+
+    def test_export_csv(self):
+        """ Test recipes are streamed as CSV, by format or Accept """
+        recipe = sample_recipe(self.user, 'Curry, hot')
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'),
+                        Tag.objects.create(user=self.user, name='Spicy'))
+
+        for res in (self.client.get(EXPORT_URL, {'format': 'csv'}),
+                    self.client.get(EXPORT_URL, HTTP_ACCEPT='text/csv')):
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res['Content-Type'], 'text/csv; charset=utf-8')
+            rows = list(csv.reader(io.StringIO(read(res))))
+            self.assertEqual(rows, [
+                ['id', 'title', 'time_miniutes', 'price', 'link', 'tags',
+                 'ingreedient'],
+                [str(recipe.id), 'Curry, hot', '10', '5.00', '',
+                 'Spicy; Vegan', ''],
+            ])
+
+    def test_export_filtered(self):
+        """ Test the export applies the list filters """
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        tagged = sample_recipe(self.user, 'Curry')
+        tagged.tags.add(tag)
+        sample_recipe(self.user, 'Steak')
+
+        res = self.client.get(EXPORT_URL, {'tags': tag.id})
+
+        rows = [json.loads(line) for line in read(res).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [tagged.id])
+
+    @override_settings(API_EXPORT_CHUNK_SIZE=2)
+    def test_export_queries_per_chunk(self):
+        """ Test the relations are fetched once per chunk of recipes,
+        not per recipe """
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+
+        def count_queries(recipes):
+            for i in range(recipes):
+                sample_recipe(self.user, f'Recipe {i}').tags.add(tag)
+            with CaptureQueriesContext(connection) as queries:
+                read(self.client.get(EXPORT_URL))
+            Recipe.objects.all().delete()
+            return len(queries)
+
+        one_chunk = count_queries(2)
+        three_chunks = count_queries(6)
+
+        self.assertEqual(three_chunks, one_chunk + 4)
+
+
+class AsgiRecipeExportTest(TransactionTestCase):
+    """ Test the export sent to the ASGI handler """
+
+    def tearDown(self):
+        # Opened by the view on the thread sync views run on
+        asyncio.run(sync_to_async(connections.close_all)())
+
+    def request(self, token):
+        """ Send an export request to the ASGI handler and return the
+        messages sent back """
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': EXPORT_URL,
+            'raw_path': EXPORT_URL.encode(),
+            'query_string': b'format=csv',
+            'headers': [(b'host', b'testserver'),
+                        (b'authorization', f'Token {token}'.encode())],
+            'server': ('testserver', 80),
+            'client': ('127.0.0.1', 0),
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(ASGIHandler()(scope, receive, send))
+        return messages
+
+    def test_export_asgi_refused(self):
+        """ Test ASGI workers refuse the export, which would run its
+        queries on the event loop, for the proxy to send it to WSGI """
+        user = get_user_model().objects.create_user('asgi@theesh.com')
+        token = Token.objects.create(user=user)
+        sample_recipe(user, 'Recipe')
+
+        messages = self.request(token.key)
+
+        self.assertEqual(messages[0]['status'], 421)
+        body = b''.join(message.get('body', b'')
+                        for message in messages[1:]).decode()
+        self.assertIn('WSGI', body)
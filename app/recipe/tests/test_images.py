@@ -0,0 +1,154 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+import io
+
+from PIL import Image
+from prometheus_client import REGISTRY
+
+from core.models import Recipe
+from recipe import images
+
+
+def sample_image_name(size=(800, 400), mode='RGB'):
+    """ Save a sample image and return its storage name """
+    buffer = io.BytesIO()
+    Image.new(mode, size).save(buffer, format='PNG')
+    return default_storage.save('upload/recipe/test-image.png',
+                                ContentFile(buffer.getvalue()))
+
+
+@override_settings(RECIPE_IMAGE_VARIANT_WIDTHS=(320, 1280),
+                   RECIPE_IMAGE_VARIANT_FORMATS=('webp', 'jpeg'))
+class ImageVariantsTest(TestCase):
+    """ Test generating recipe image derivatives """
+
+    def setUp(self):
+        self.name = sample_image_name()
+        user = get_user_model().objects.create_user('images@theesh.com')
+        self.recipe = Recipe.objects.create(user=user, title='Curry',
+                                            time_miniutes=5, price=5,
+                                            image=self.name)
+        self.variants = [
+            images.variant_name(self.name, width, fmt)
+            for width in (320, 1280)
+            for fmt in images.variant_formats()
+        ]
+
+    def tearDown(self):
+        for name in [self.name] + self.variants:
+            default_storage.delete(name)
+
+    def test_variant_name(self):
+        """ Test derivatives are stored next to the original """
+        name = images.variant_name('upload/recipe/abc.png', 320, 'jpeg')
+        self.assertEqual(name, 'upload/recipe/abc_320w.jpg')
+
+    def test_generate_variants(self):
+        """ Test every derivative is written at its width """
+        keys = images.generate_variants(self.name)
+
+        self.assertEqual(
+            keys, ['320w_webp', '320w_jpeg', '1280w_webp', '1280w_jpeg']
+            if 'webp' in images.variant_formats() else
+            ['320w_jpeg', '1280w_jpeg']
+        )
+        for name in self.variants:
+            with default_storage.open(name) as variant_file:
+                width, height = Image.open(variant_file).size
+            self.assertLessEqual(width, 1280)
+            self.assertEqual(width, 2 * height)
+
+        with default_storage.open(self.variants[0]) as variant_file:
+            self.assertEqual(Image.open(variant_file).width, 320)
+
+    def test_generate_variants_not_upscaled(self):
+        """ Test images narrower than a variant keep their size """
+        images.generate_variants(self.name)
+
+        with default_storage.open(self.variants[-1]) as variant_file:
+            self.assertEqual(Image.open(variant_file).width, 800)
+
+    def test_generate_variants_transparent(self):
+        """ Test images with alpha can be written as jpeg """
+        default_storage.delete(self.name)
+        self.name = sample_image_name(mode='RGBA')
+
+        images.generate_variants(self.name)
+        for name in self.variants:
+            self.assertTrue(default_storage.exists(name))
+
+    def test_image_variant_urls(self):
+        """ Test a URL is returned for each derivative written """
+        self.assertEqual(images.image_variant_urls(self.recipe), {})
+
+        self.recipe.image_variant_keys = ['320w_jpeg', '320w_gif']
+        urls = images.image_variant_urls(self.recipe)
+
+        self.assertEqual(urls, {
+            '320w_jpeg': default_storage.url(
+                images.variant_name(self.name, 320, 'jpeg')
+            ),
+        })
+        self.recipe.image = None
+        self.assertIsNone(images.image_variant_urls(self.recipe))
+
+    def test_delete_variants(self):
+        """ Test the derivatives of an image are deleted """
+        images.generate_variants(self.name)
+
+        images.delete_variants(self.name)
+
+        for name in self.variants:
+            self.assertFalse(default_storage.exists(name))
+        self.assertTrue(default_storage.exists(self.name))
+
+    @patch('recipe.images.close_old_connections')
+    @patch.object(images.pool, 'get')
+    def test_schedule_variants_after_commit(self, get_pool, close):
+        """ Test derivatives are queued on the worker pool and recorded
+        once written """
+        with self.captureOnCommitCallbacks(execute=True):
+            images.schedule_variants(self.recipe, 'upload/recipe/old.png')
+
+        get_pool.return_value.submit.assert_called_once_with(
+            images._run, self.recipe.pk, self.name, 'upload/recipe/old.png'
+        )
+        self.assertEqual(images.queue_depth(), 1)
+        self.assertEqual(
+            REGISTRY.get_sample_value('recipe_image_queue_depth'), 1
+        )
+        with patch('recipe.images.delete_variants') as delete_variants:
+            images._run(self.recipe.pk, self.name, 'upload/recipe/old.png')
+        delete_variants.assert_called_once_with('upload/recipe/old.png')
+        self.assertEqual(images.queue_depth(), 0)
+        self.assertEqual(
+            REGISTRY.get_sample_value('recipe_image_queue_depth'), 0
+        )
+        self.recipe.refresh_from_db()
+        self.assertEqual(len(self.recipe.image_variant_keys),
+                         len(self.variants))
+
+    def test_failed_variants_not_recorded(self):
+        """ Test no derivative is exposed when their generation fails """
+        default_storage.delete(self.name)
+
+        with self.assertLogs('recipe.images', 'ERROR'):
+            images.process_image(self.recipe.pk, self.name)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_variant_keys, [])
+
+    def test_replaced_image_not_recorded(self):
+        """ Test derivatives of an image replaced meanwhile are not
+        recorded on the recipe """
+        Recipe.objects.filter(pk=self.recipe.pk).update(image='other.png')
+
+        images.process_image(self.recipe.pk, self.name)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_variant_keys, [])
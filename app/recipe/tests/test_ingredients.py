@@ -42,7 +42,7 @@ class PrivateIngreedinentApiTest(TestCase):
         ingreedient = Ingreedient.objects.all().order_by('-name')
         serializer = IngreedientSerializer(ingreedient, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         """ Test that ingreedients for the authentication user
@@ -57,8 +57,8 @@ class PrivateIngreedinentApiTest(TestCase):
 
         res = self.client.get(INGREEDIENTS_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ingredient.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ingredient.name)
 
     def test_create_ingreedient_successfull(self):
         """ Test creating a new tag """
@@ -91,13 +91,14 @@ class PrivateIngreedinentApiTest(TestCase):
         )
 
         recipe.ingreedient.add(ing1)
+        ing1.refresh_from_db()
 
         res = self.client.get(INGREEDIENTS_URL, {'assigned_only': 1})
         serializer1 = IngreedientSerializer(ing1)
         serializer2 = IngreedientSerializer(ing2)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
 
     def test_retreave_ingreedient_assigned_unique(self):
         """ Test filtering tags by assigned returns unique items """
@@ -120,4 +121,4 @@ class PrivateIngreedinentApiTest(TestCase):
         recipe2.ingreedient.add(ing)
 
         res = self.client.get(INGREEDIENTS_URL, {'assigned_only': 1})
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
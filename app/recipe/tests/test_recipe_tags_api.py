@@ -43,7 +43,7 @@ class PrivateTagesApiTest(TestCase):
         tag = Tag.objects.all().order_by('-name')
         serializer = TagSerializer(tag, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tag_limited_to_user(self):
         """ check tags are limited to the authenticated user"""
@@ -55,8 +55,8 @@ class PrivateTagesApiTest(TestCase):
         tag = Tag.objects.create(user=self.user, name='Comfort Food')
         res = self.client.get(TAG_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
 
     def test_create_tag_successfull(self):
         """ Test creating a new tag """
@@ -89,13 +89,14 @@ class PrivateTagesApiTest(TestCase):
         )
 
         recipe.tags.add(tag1)
+        tag1.refresh_from_db()
 
         res = self.client.get(TAG_URL, {'assigned_only': 1})
         serializer1 = TagSerializer(tag1)
         serializer2 = TagSerializer(tag2)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
 
     def test_retreave_tags_assigned_unique(self):
         """ Test filtering tags by assigned returns unique items """
@@ -118,4 +119,70 @@ class PrivateTagesApiTest(TestCase):
         recipe2.tags.add(tag)
 
         res = self.client.get(TAG_URL, {'assigned_only': 1})
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_tags_paginated_by_name(self):
+        """ Test tags with equal names are not skipped across pages """
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('Breakfast', 'Lunch', 'Lunch', 'Supper')
+        ]
+
+        names = []
+        res = self.client.get(TAG_URL, {'page_size': 1})
+        while True:
+            names += [tag['name'] for tag in res.data['results']]
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(names, sorted([t.name for t in tags], reverse=True))
+
+    def test_tags_by_popularity(self):
+        """ Test tags can be filtered and ordered by recipe count """
+        popular = Tag.objects.create(user=self.user, name='Dinner')
+        used = Tag.objects.create(user=self.user, name='Lunch')
+        Tag.objects.create(user=self.user, name='Brunch')
+        for i in range(2):
+            recipe = Recipe.objects.create(user=self.user, title=f'R {i}',
+                                           time_miniutes=5, price=5.00)
+            recipe.tags.add(popular)
+        recipe.tags.add(used)
+
+        res = self.client.get(TAG_URL, {'ordering': 'popular',
+                                        'min_recipes': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(tag['name'], tag['recipe_count'])
+             for tag in res.data['results']],
+            [('Dinner', 2), ('Lunch', 1)]
+        )
+
+    def test_min_recipes_invalid(self):
+        """ Test a min_recipes that is not a number is rejected """
+        res = self.client.get(TAG_URL, {'min_recipes': 'abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('min_recipes', res.data)
+
+    def test_tags_by_popularity_pages(self):
+        """ Test paging through tags by popularity returns each tag once
+        when many share a recipe count """
+        recipe = Recipe.objects.create(user=self.user, title='Curry',
+                                       time_miniutes=5, price=5.00)
+        tags = [Tag.objects.create(user=self.user, name=f'Tag {i}')
+                for i in range(5)]
+        recipe.tags.add(*tags[:2])
+
+        ids = []
+        res = self.client.get(TAG_URL, {'ordering': 'popular',
+                                        'page_size': 2})
+        while True:
+            self.assertNotIn('count', res.data)
+            ids += [tag['id'] for tag in res.data['results']]
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(ids, [tag.id for tag in tags])
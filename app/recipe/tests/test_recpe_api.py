@@ -1,15 +1,22 @@
-from django.test import TestCase
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory
 
+import io
 import tempfile
 import os
+from unittest.mock import patch
 
 from PIL import Image
 
 from core.models import Recipe, Ingreedient, Tag
+from recipe.pagination import RecipeCursorPagination
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 
 RECIPE_URL = reverse('recipe:recipe-list')
@@ -50,6 +57,34 @@ def sampe_ingreedient(user, name="Cinnoman"):
     return Ingreedient.objects.create(user=user, name=name)
 
 
+def sample_tagged_recepe(user, **params):
+    """ Create a sample recipe with a tag and an ingreedient """
+    recipe = sample_recepe(user=user, **params)
+    recipe.tags.add(sampe_tag(user=user))
+    recipe.ingreedient.add(sampe_ingreedient(user=user))
+
+    return recipe
+
+
+class QueryCountMixin:
+    """ Helpers for asserting the query count of an endpoint """
+
+    def get_query_count(self, url):
+        """ Perform a GET on url and return the number of queries """
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def assertConstantQueries(self, url, add_objects, times=5):
+        """ Assert the queries for url do not grow when add_objects
+        is called to create more data """
+        expected = self.get_query_count(url)
+        add_objects(times)
+        self.assertEqual(self.get_query_count(url), expected)
+
+
 class PublicRecipeAPITest(TestCase):
     """ Test unauthenticated recepe api """
 
@@ -62,7 +97,7 @@ class PublicRecipeAPITest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateRecipeAPITest(TestCase):
+class PrivateRecipeAPITest(QueryCountMixin, TestCase):
     """ Test authenticated recipe API access """
 
     def setUp(self):
@@ -82,7 +117,7 @@ class PrivateRecipeAPITest(TestCase):
         recipes = Recipe.objects.all().order_by('-id')
         serializer = RecipeSerializer(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipes_are_limited_to_user(self):
         """ Test recipes are only returns according to the user """
@@ -99,8 +134,8 @@ class PrivateRecipeAPITest(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_view_recipe_details(self):
         """ Test viewving a recipe detail """
@@ -208,6 +243,106 @@ class PrivateRecipeAPITest(TestCase):
         tags = recipe.tags.all()
         self.assertEqual(len(tags), 0)
 
+    def test_recipes_paginated_by_cursor(self):
+        """ Test recipes are returned newest first in cursor pages """
+        recipes = [sample_recepe(user=self.user) for _ in range(3)]
+
+        res = self.client.get(RECIPE_URL, {'page_size': 2})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [recipes[2].id, recipes[1].id])
+
+        res = self.client.get(res.data['next'])
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [recipes[0].id])
+        self.assertIsNone(res.data['next'])
+
+    @patch.object(RecipeCursorPagination, 'max_page_size', 2)
+    def test_recipes_page_size_capped(self):
+        """ Test the requested page size can not exceed the cap """
+        for _ in range(3):
+            sample_recepe(user=self.user)
+
+        res = self.client.get(RECIPE_URL, {'page_size': 100})
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIsNotNone(res.data['next'])
+
+    def test_list_recipes_constant_queries(self):
+        """ Test listing recipes does not query once per recipe """
+        sample_tagged_recepe(user=self.user)
+
+        def add_recipes(count):
+            for _ in range(count):
+                sample_tagged_recepe(user=self.user)
+
+        self.assertConstantQueries(RECIPE_URL, add_recipes)
+
+    def test_recipe_detail_constant_queries(self):
+        """ Test a recipe detail does not query once per tag
+        or ingreedient """
+        recipe = sample_tagged_recepe(user=self.user)
+
+        def add_relations(count):
+            for i in range(count):
+                recipe.tags.add(sampe_tag(user=self.user, name=f'Tag {i}'))
+                recipe.ingreedient.add(
+                    sampe_ingreedient(user=self.user, name=f'Ing {i}')
+                )
+
+        self.assertConstantQueries(detail_url(recipe.id), add_relations)
+
+    def test_create_recipe_validates_relations_in_one_query(self):
+        """ Test the ids of a relation are checked with one query """
+        ingreedients = [
+            sampe_ingreedient(user=self.user, name=f'Ing {i}')
+            for i in range(30)
+        ]
+        payload = {
+            'title': 'Big stew',
+            'ingreedient': [ingreedient.id for ingreedient in ingreedients],
+            'tags': [],
+            'time_miniutes': 90,
+            'price': 12.00
+        }
+        request = APIRequestFactory().post(RECIPE_URL)
+        request.user = self.user
+        serializer = RecipeSerializer(
+            data=payload,
+            context={'request': request}
+        )
+
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data['ingreedient'],
+                         ingreedients)
+
+    def test_create_recipe_with_other_users_relations(self):
+        """ Test tags and ingreedients of another user are rejected,
+        with every missing id reported together """
+        user2 = get_user_model().objects.create_user(
+            'other@theesh.com',
+            'testpass'
+        )
+        own_tag = sampe_tag(user=self.user)
+        other_tags = [sampe_tag(user=user2, name=f'Tag {i}')
+                      for i in range(2)]
+        payload = {
+            'title': 'Borrowed curry',
+            'tags': [own_tag.id] + [tag.id for tag in other_tags] + [0],
+            'time_miniutes': 20,
+            'price': 7.00
+        }
+
+        res = self.client.post(RECIPE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        missing = [tag.id for tag in other_tags] + [0]
+        self.assertEqual(
+            res.data['tags'],
+            [f'Invalid pks {missing} - objects do not exist.']
+        )
+        self.assertFalse(Recipe.objects.exists())
+
 
 class RecepeImageUploadTest(TestCase):
     """ Test image uploading """
@@ -224,7 +359,8 @@ class RecepeImageUploadTest(TestCase):
     def tearDown(self):
         self.recipe.image.delete()
 
-    def test_uploading_image(self):
+    @patch('recipe.views.images.schedule_variants')
+    def test_uploading_image(self, schedule_variants):
         """ testing valid image upload """
         url = image_uplaod_url(self.recipe.id)
         with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
@@ -236,7 +372,30 @@ class RecepeImageUploadTest(TestCase):
         self.recipe.refresh_from_db()
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertIn('image', res.data)
+        self.assertEqual(res.data['image_variants'], {})
         self.assertTrue(os.path.exists(self.recipe.image.path))
+        schedule_variants.assert_called_once_with(self.recipe, '')
+
+    @patch('recipe.views.images.schedule_variants')
+    def test_replacing_image(self, schedule_variants):
+        """ Test the derivatives of a replaced image are hidden and
+        scheduled for deletion """
+        self.recipe.image = 'upload/recipe/old.png'
+        self.recipe.image_variant_keys = ['320w_jpeg']
+        self.recipe.save()
+        url = image_uplaod_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (10, 10)).save(ntf, format='JPEG')
+            ntf.seek(0)
+            res = self.client.post(url, {'image': ntf}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_variants'], {})
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_variant_keys, [])
+        schedule_variants.assert_called_once_with(
+            self.recipe, 'upload/recipe/old.png'
+        )
 
     def test_upload_image_bad(self):
         """ testing invalid image upload """
@@ -244,6 +403,65 @@ class RecepeImageUploadTest(TestCase):
         res = self.client.post(url, {'image': 'notimage'}, format='multipart')
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def stored_images(self):
+        """ Return the names of the stored recipe images """
+        if not default_storage.exists('upload/recipe'):
+            return set()
+        return set(default_storage.listdir('upload/recipe')[1])
+
+    @patch('recipe.views.images.schedule_variants')
+    @patch('django.core.files.storage.FileSystemStorage._save')
+    def test_upload_image_streamed_in_place(self, save, schedule_variants):
+        """ Test the image is written once, straight to its location """
+        url = image_uplaod_url(self.recipe.id)
+        img = io.BytesIO()
+        Image.new('RGB', (10, 10)).save(img, format='PNG')
+        upload = SimpleUploadedFile('photo.jpg', img.getvalue())
+
+        res = self.client.post(url, {'image': upload}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertTrue(self.recipe.image.name.endswith('.png'))
+        self.assertTrue(os.path.exists(self.recipe.image.path))
+        save.assert_not_called()
+
+    def test_upload_not_image_rejected(self):
+        """ Test a file without an image header is rejected and
+        nothing is stored """
+        url = image_uplaod_url(self.recipe.id)
+        before = self.stored_images()
+        upload = SimpleUploadedFile('photo.jpg', b'not an image' * 100)
+
+        res = self.client.post(url, {'image': upload}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.stored_images(), before)
+
+    def test_upload_corrupt_image_discarded(self):
+        """ Test an image that fails validation is removed """
+        url = image_uplaod_url(self.recipe.id)
+        before = self.stored_images()
+        upload = SimpleUploadedFile('photo.jpg', b'\xff\xd8\xff' + b'0' * 100)
+
+        res = self.client.post(url, {'image': upload}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.stored_images(), before)
+
+    @override_settings(RECIPE_IMAGE_MAX_UPLOAD_SIZE=1024)
+    def test_upload_image_too_large(self):
+        """ Test images over the size limit are rejected """
+        url = image_uplaod_url(self.recipe.id)
+        before = self.stored_images()
+        upload = SimpleUploadedFile('photo.jpg', b'\xff\xd8\xff' + b'0' * 2048)
+
+        res = self.client.post(url, {'image': upload}, format='multipart')
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(self.stored_images(), before)
+
     def test_filter_recipes_by_tags(self):
         """ returning recipes by specific tags """
         recope1 = sample_recepe(user=self.user, title="Thai vegi curry")
@@ -262,9 +480,9 @@ class RecepeImageUploadTest(TestCase):
         serialized1 = RecipeSerializer(recope1)
         serialized2 = RecipeSerializer(recope2)
         serialized3 = RecipeSerializer(recope3)
-        self.assertIn(serialized1.data, res.data)
-        self.assertIn(serialized2.data, res.data)
-        self.assertNotIn(serialized3.data, res.data)
+        self.assertIn(serialized1.data, res.data['results'])
+        self.assertIn(serialized2.data, res.data['results'])
+        self.assertNotIn(serialized3.data, res.data['results'])
 
     def test_filter_recipes_by_ingredients(self):
         """ returning recipes by specific ingreediants """
@@ -285,6 +503,46 @@ class RecepeImageUploadTest(TestCase):
         serialized1 = RecipeSerializer(recope1)
         serialized2 = RecipeSerializer(recope2)
         serialized3 = RecipeSerializer(recope3)
-        self.assertIn(serialized1.data, res.data)
-        self.assertIn(serialized2.data, res.data)
-        self.assertNotIn(serialized3.data, res.data)
+        self.assertIn(serialized1.data, res.data['results'])
+        self.assertIn(serialized2.data, res.data['results'])
+        self.assertNotIn(serialized3.data, res.data['results'])
+
+    def filtered_ids(self, **params):
+        """ Return the ids of the recipes listed with params """
+        res = self.client.get(RECIPE_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['id'] for recipe in res.data['results']]
+
+    def test_filter_recipes_by_tags_and_ingredients(self):
+        """ Test both filters apply together without duplicates """
+        tag1 = sampe_tag(user=self.user, name='Vegan')
+        tag2 = sampe_tag(user=self.user, name='Quick')
+        ingredient = sampe_ingreedient(user=self.user, name='Tofu')
+        both = sample_recepe(user=self.user, title='Tofu stir fry')
+        both.tags.add(tag1, tag2)
+        both.ingreedient.add(ingredient)
+        tags_only = sample_recepe(user=self.user, title='Salad')
+        tags_only.tags.add(tag1)
+
+        ids = self.filtered_ids(tags=f'{tag1.id},{tag2.id}')
+        self.assertEqual(ids, [tags_only.id, both.id])
+
+        ids = self.filtered_ids(tags=f'{tag1.id},{tag2.id}',
+                                ingreedient=f'{ingredient.id}')
+        self.assertEqual(ids, [both.id])
+
+    def test_filter_recipes_matching_all(self):
+        """ Test match=all only returns recipes with every id """
+        tag1 = sampe_tag(user=self.user, name='Vegan')
+        tag2 = sampe_tag(user=self.user, name='Quick')
+        both = sample_recepe(user=self.user, title='Tofu stir fry')
+        both.tags.add(tag1, tag2)
+        sample_recepe(user=self.user, title='Salad').tags.add(tag1)
+
+        ids = self.filtered_ids(tags=f'{tag1.id},{tag2.id},{tag2.id}',
+                                match='all')
+        self.assertEqual(ids, [both.id])
+
+        res = self.client.get(RECIPE_URL, {'tags': tag1.id,
+                                           'match': 'some'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,141 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingreedient, Recipe, touch
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def sample_recipe(user, title):
+    """ Create and return a sample recipe """
+    return Recipe.objects.create(
+        user=user,
+        title=title,
+        time_miniutes=10,
+        price=5.00
+    )
+
+
+class RecipeSearchTest(TestCase):
+    """ Test full text search of recipes """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'search@theesh.com',
+            'testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, text, **params):
+        """ Search recipes and return the ids found """
+        res = self.client.get(RECIPE_URL, {'search': text, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['id'] for recipe in res.data['results']]
+
+    def test_search_title_tags_and_ingreedients(self):
+        """ Test recipes are found by title, tag or ingreedient name """
+        curry = sample_recipe(self.user, 'Thai red curry')
+        soup = sample_recipe(self.user, 'Pumpkin soup')
+        soup.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        salad = sample_recipe(self.user, 'Summer salad')
+        salad.ingreedient.add(
+            Ingreedient.objects.create(user=self.user, name='Cucumbers')
+        )
+
+        self.assertEqual(self.search('curries'), [curry.id])
+        self.assertEqual(self.search('vegan'), [soup.id])
+        self.assertEqual(self.search('cucumber'), [salad.id])
+        self.assertEqual(self.search('pizza'), [])
+
+    def test_search_ordered_by_rank(self):
+        """ Test title matches rank above tag matches """
+        tagged = sample_recipe(self.user, 'Fried rice')
+        tagged.tags.add(Tag.objects.create(user=self.user, name='Spicy'))
+        titled = sample_recipe(self.user, 'Spicy noodles')
+
+        self.assertEqual(self.search('spicy'), [titled.id, tagged.id])
+
+    def test_search_paginated(self):
+        """ Test search results can be paged through with the cursor """
+        recipes = [sample_recipe(self.user, 'Banana bread')
+                   for _ in range(3)]
+
+        res = self.client.get(RECIPE_URL, {'search': 'banana',
+                                           'page_size': 2})
+        ids = [recipe['id'] for recipe in res.data['results']]
+        res = self.client.get(res.data['next'])
+        ids += [recipe['id'] for recipe in res.data['results']]
+
+        self.assertEqual(ids, [recipe.id for recipe in reversed(recipes)])
+
+    def test_search_follows_changes(self):
+        """ Test renamed and removed relations update the search """
+        recipe = sample_recipe(self.user, 'Stew')
+        tag = Tag.objects.create(user=self.user, name='Winter')
+        recipe.tags.add(tag)
+
+        tag.name = 'Autumn'
+        tag.save()
+        self.assertEqual(self.search('winter'), [])
+        self.assertEqual(self.search('autumn'), [recipe.id])
+
+        recipe.tags.remove(tag)
+        self.assertEqual(self.search('autumn'), [])
+
+        recipe.title = 'Goulash'
+        recipe.save()
+        self.assertEqual(self.search('goulash'), [recipe.id])
+
+    def test_search_vector_kept_on_touch(self):
+        """ Test updates leaving the title alone do not recompute the
+        vector """
+        recipe = sample_recipe(self.user, 'Stew')
+        with connection.cursor() as cursor:
+            # Runs the pending foreign key checks, which block ALTER
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            cursor.execute('ALTER TABLE core_recipe DISABLE TRIGGER '
+                           'core_recipe_search_vector_update')
+            cursor.execute("UPDATE core_recipe SET search_vector = "
+                           "to_tsvector('english', 'stale') WHERE id = %s",
+                           [recipe.id])
+            cursor.execute('ALTER TABLE core_recipe ENABLE TRIGGER '
+                           'core_recipe_search_vector_update')
+
+        recipes = Recipe.objects.filter(id=recipe.id)
+        touch(recipes)
+        self.assertEqual(recipes.values_list('search_vector', flat=True)[0],
+                         "'stale':1")
+
+        recipes.update(title='Goulash')
+        self.assertEqual(recipes.values_list('search_vector', flat=True)[0],
+                         "'goulash':1A")
+
+    def test_search_after_bulk_create(self):
+        """ Test recipes created in bulk are searchable """
+        tag = Tag.objects.create(user=self.user, name='Breakfast')
+        res = self.client.post(reverse('recipe:recipe-bulk'), [{
+            'title': 'Porridge',
+            'time_miniutes': 5,
+            'price': 2.00,
+            'tags': [tag.id],
+            'ingreedient': [],
+        }], format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self.search('breakfast'),
+                         [res.data['results'][0]['id']])
+
+    def test_search_limited_to_user(self):
+        """ Test other users' recipes are not searched """
+        user2 = get_user_model().objects.create_user(
+            'search2@theesh.com',
+            'testpass'
+        )
+        sample_recipe(user2, 'Lemon tart')
+
+        self.assertEqual(self.search('lemon'), [])
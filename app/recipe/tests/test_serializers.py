@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+
+from core.models import Tag, Ingreedient, Recipe
+from recipe import serializers, views
+from recipe.management.commands.explain_queries import get_view_queryset
+
+
+class RecipeReadSerializerTests(TestCase):
+    """ Test the read only serializers match the model serializers """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'read@theesh.com',
+            'testpass'
+        )
+        self.request = APIRequestFactory().get('/api/recipe/recipes/')
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Steak',
+            time_miniutes=30,
+            price=Decimal('12.30'),
+            link='https://theesh.com/steak',
+            image='uploads/recipe/steak.jpg'
+        )
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Dinner'),
+                        Tag.objects.create(user=self.user, name='Meat'))
+        recipe.ingreedient.add(
+            Ingreedient.objects.create(user=self.user, name='Salt')
+        )
+        Recipe.objects.create(user=self.user, title='Toast',
+                              time_miniutes=2, price=1)
+
+    def assertSameData(self, action, model_serializer, read_serializer):
+        recipes = list(get_view_queryset(views.RecipeViewSet, self.user,
+                                         action, paginate=False))
+        context = {'request': self.request}
+
+        expected = model_serializer(recipes, many=True, context=context)
+        data = read_serializer(recipes, many=True, context=context)
+
+        self.assertEqual(len(data.data), 2)
+        self.assertEqual(data.data, expected.data)
+
+    def test_list_matches_recipe_serializer(self):
+        """ Test the list fast path returns the same data """
+        self.assertSameData('list', serializers.RecipeSerializer,
+                            serializers.RecipeReadSerializer)
+
+    def test_detail_matches_recipe_detail_serializer(self):
+        """ Test the detail fast path returns the same data """
+        self.assertSameData('retrieve', serializers.RecipeDetailSerializer,
+                            serializers.RecipeDetailReadSerializer)
+
+    def test_price_keeps_decimal_places(self):
+        """ Test the price is rendered as a string with two places """
+        recipe = Recipe.objects.get(title='Toast')
+
+        data = serializers.RecipeReadSerializer(recipe).data
+
+        self.assertEqual(data['price'], '1.00')
+        self.assertIsNone(data['image_variants'])
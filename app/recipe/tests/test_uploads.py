@@ -0,0 +1,24 @@
+from django.test import SimpleTestCase
+
+from recipe.uploads import sniff_image
+
+
+class SniffImageTest(SimpleTestCase):
+    """ Test recognising images from their first bytes """
+
+    def test_sniff_supported_formats(self):
+        """ Test the supported formats are recognised """
+        headers = {
+            b'\xff\xd8\xff\xe0\x00\x10JFIF\x00': 'jpg',
+            b'\x89PNG\r\n\x1a\n\x00\x00\x00\r': 'png',
+            b'GIF89a\x01\x00\x01\x00\x00\x00': 'gif',
+            b'RIFF\x24\x00\x00\x00WEBP': 'webp',
+        }
+        for header, extension in headers.items():
+            self.assertEqual(sniff_image(header), extension)
+
+    def test_sniff_not_image(self):
+        """ Test other content is not recognised """
+        self.assertIsNone(sniff_image(b'<html><body>'))
+        self.assertIsNone(sniff_image(b'RIFF\x24\x00\x00\x00WAVE'))
+        self.assertIsNone(sniff_image(b''))
@@ -0,0 +1,175 @@
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.http.multipartparser import \
+    MultiPartParser as DjangoMultiPartParser, MultiPartParserError
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.parsers import DataAndFiles, MultiPartParser
+
+from core.models import recipe_image_file_path
+
+# Enough leading bytes to recognise every supported format
+HEADER_SIZE = 12
+# Allowance for the multipart boundaries and part headers
+MULTIPART_OVERHEAD = 16 * 2 ** 10
+
+
+def sniff_image(header):
+    """ Return the file extension of the image format the header
+    belongs to, or None if it is not a supported image """
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if header[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+class ImageTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = _('The uploaded image is too large.')
+    default_code = 'image_too_large'
+
+
+class InvalidImage(ParseError):
+    default_detail = _('Upload a valid image. The file you uploaded was '
+                       'either not an image or a corrupted image.')
+    default_code = 'invalid_image'
+
+
+class StoredImageUpload(UploadedFile):
+    """ An image streamed straight to its final storage location """
+
+    def __init__(self, storage_name, content_type, charset=None,
+                 content_type_extra=None):
+        path = default_storage.path(storage_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        super().__init__(open(path, 'w+b'), os.path.basename(storage_name),
+                         content_type, 0, charset, content_type_extra)
+        self.storage_name = storage_name
+
+    def temporary_file_path(self):
+        """ Let the image validation open the file by path """
+        return self.file.name
+
+    def discard(self):
+        """ Remove a stored image that will not be used """
+        self.close()
+        default_storage.delete(self.storage_name)
+
+
+class StreamingImageUploadHandler(FileUploadHandler):
+    """ Write an uploaded image to its final location as it arrives,
+    rejecting it as soon as it is too large or not an image """
+    chunk_size = 64 * 2 ** 10
+
+    def __init__(self, request=None, field_name='image', max_size=None):
+        super().__init__(request)
+        self.field_name = field_name
+        self.max_size = max_size or settings.RECIPE_IMAGE_MAX_UPLOAD_SIZE
+        self.upload = None
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        """ Reject a body that can not fit under the limit unread """
+        if content_length > self.max_size + MULTIPART_OVERHEAD:
+            raise ImageTooLarge()
+
+    def new_file(self, field_name, *args, **kwargs):
+        """ Start receiving the image, other files are skipped """
+        super().new_file(field_name, *args, **kwargs)
+        if field_name != self.field_name:
+            raise SkipFile()
+
+        self.header = b''
+        self.received = 0
+
+    def open_upload(self):
+        """ Create the image at its final location once its format
+        is known from the header """
+        extension = sniff_image(self.header)
+        if extension is None:
+            raise InvalidImage()
+
+        self.upload = StoredImageUpload(
+            recipe_image_file_path(None, f'{self.file_name}.{extension}'),
+            self.content_type,
+            self.charset,
+            self.content_type_extra,
+        )
+        self.upload.write(self.header)
+
+    def receive_data_chunk(self, raw_data, start):
+        """ Write a chunk of the image """
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            raise ImageTooLarge()
+
+        if self.upload is None:
+            self.header += raw_data
+            if len(self.header) >= HEADER_SIZE:
+                self.open_upload()
+        else:
+            self.upload.write(raw_data)
+
+    def file_complete(self, file_size):
+        """ Return the stored image """
+        if self.upload is None:
+            if not self.header:
+                return None
+            self.open_upload()
+
+        self.upload.seek(0)
+        self.upload.size = file_size
+        return self.upload
+
+    def abort(self):
+        """ Remove a partially written image """
+        if self.upload is not None:
+            self.upload.discard()
+            self.upload = None
+
+
+class StreamingImageParser(MultiPartParser):
+    """ Multipart parser that streams the image field to storage,
+    falling back to the default handlers for storages without
+    local paths """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            default_storage.path('')
+        except NotImplementedError:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        request = parser_context['request']
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        meta = request.META.copy()
+        meta['CONTENT_TYPE'] = media_type
+        handler = StreamingImageUploadHandler(request)
+
+        try:
+            parser = DjangoMultiPartParser(meta, stream, [handler], encoding)
+            data, files = parser.parse()
+            return DataAndFiles(data, files)
+        except MultiPartParserError as exc:
+            handler.abort()
+            raise ParseError('Multipart form parse error - %s' % str(exc))
+        except Exception:
+            handler.abort()
+            raise
+
+
+def discard_uploads(files):
+    """ Remove streamed images of a request that failed validation """
+    for upload in files.values():
+        if isinstance(upload, StoredImageUpload):
+            upload.discard()
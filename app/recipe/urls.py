@@ -1,8 +1,10 @@
+from django.conf import settings
 from django.urls import path, include
 
 from rest_framework.routers import DefaultRouter
 
 from recipe import views
+from recipe.async_views import async_read_urlpatterns
 
 router = DefaultRouter()
 
@@ -10,8 +12,25 @@ router.register('tags', views.TagViewSet)
 router.register('ingreedient', views.IngreedientViewSet)
 router.register('recipe', views.RecipeViewSet)
 
+# Routes served by async views with ASYNC_READ_VIEWS
+ASYNC_READ_ROUTES = {
+    f'{basename}-{route}'
+    for basename in ('tag', 'ingreedient', 'recipe')
+    for route in ('list', 'detail')
+}
+
 app_name = 'recipe'
 
+
+def get_routes(async_reads=False):
+    """ Return the router URL patterns, with the list and detail routes
+    async if async_reads is set """
+    if async_reads:
+        return async_read_urlpatterns(router.urls, ASYNC_READ_ROUTES)
+
+    return router.urls
+
+
 urlpatterns = [
-    path('', include(router.urls))
+    path('', include(get_routes(settings.ASYNC_READ_VIEWS)))
 ]
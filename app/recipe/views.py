@@ -1,18 +1,36 @@
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
-from core.models import Tag, Ingreedient, Recipe
-from recipe import serializers
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Count, Exists, F, FloatField, OuterRef, \
+    Prefetch
+from django.db.models.functions import Cast
+from django.utils.translation import gettext_lazy as _
+
+from core.authentication import CachedTokenAuthentication
+from core.models import SEARCH_CONFIG, Tag, Ingreedient, Recipe
+from recipe import images, serializers
+from recipe.bulk import BulkMixin
+from recipe.cache import CachedListMixin, CachedRetrieveMixin
+from recipe.conditional import ConditionalGetMixin
+from recipe.export import ExportMixin
+from recipe.pagination import NameCursorPagination, RecipeCursorPagination
+from recipe.params import get_search
+from recipe.uploads import StreamingImageParser, discard_uploads
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
 
-class BaseRecipeViewSet(viewsets.GenericViewSet,
+class BaseRecipeViewSet(BulkMixin,
+                        ConditionalGetMixin,
+                        CachedListMixin,
+                        viewsets.GenericViewSet,
                         mixins.ListModelMixin,
                         mixins.CreateModelMixin):
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = NameCursorPagination
 
     def get_queryset(self):
         """ Return objects for the current authenticated user only """
@@ -22,11 +40,32 @@ class BaseRecipeViewSet(viewsets.GenericViewSet,
         queryset = self.queryset
 
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            # A semi-join stops at the first recipe instead of joining
+            # every recipe and removing the duplicates afterwards
+            relation = queryset.model._meta.get_field('recipe')
+            links = relation.through.objects.filter(
+                **{relation.field.m2m_reverse_field_name(): OuterRef('pk')}
+            )
+            queryset = queryset.filter(Exists(links))
+
+        min_recipes = self.request.query_params.get('min_recipes')
+        if min_recipes:
+            queryset = queryset.filter(
+                recipe_count__gte=self._min_recipes(min_recipes)
+            )
 
         return queryset.filter(
             user=self.request.user
-            ).order_by('-name').distinct()
+            ).order_by('-name')
+
+    def _min_recipes(self, value):
+        """ Return the minimum recipe count filtered on """
+        try:
+            return int(value)
+        except ValueError:
+            raise ValidationError(
+                {'min_recipes': _('Expected a whole number.')}
+            )
 
     def perform_create(self, serializers):
         """ Create a new object """
@@ -45,12 +84,22 @@ class IngreedientViewSet(BaseRecipeViewSet):
     serializer_class = serializers.IngreedientSerializer
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(BulkMixin,
+                    ExportMixin,
+                    ConditionalGetMixin,
+                    CachedListMixin,
+                    CachedRetrieveMixin,
+                    viewsets.ModelViewSet):
     """ Manage recipes in the db """
     serializer_class = serializers.RecipeSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeCursorPagination
+    export_serializer_class = serializers.RecipeExportSerializer
+    export_fields = ('id', 'title', 'time_miniutes', 'price', 'link', 'tags',
+                     'ingreedient')
+    export_relations = ('tags', 'ingreedient')
 
     def _params_to_ints(self, qs):
         """ Convert a list of string ids to a list of
@@ -61,22 +110,87 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """ Return objects for the current authenticated user only """
         tags = self.request.query_params.get('tags')
         ingreedient = self.request.query_params.get('ingreedient')
+        match_all = self._match_all()
         queryset = self.queryset
 
         if tags:
             tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            queryset = self._filter_related(queryset, 'tags', tag_ids,
+                                            match_all)
 
-        elif ingreedient:
+        if ingreedient:
             ingd_ids = self._params_to_ints(ingreedient)
-            queryset = queryset.filter(ingreedient__id__in=ingd_ids)
+            queryset = self._filter_related(queryset, 'ingreedient',
+                                            ingd_ids, match_all)
+
+        queryset = queryset.filter(user=self.request.user)
+        search = get_search(self.request)
+        if search:
+            queryset = self._search(queryset, search)
+
+        return self._prefetch_related(queryset)
+
+    def _match_all(self):
+        """ Return whether recipes must have every filtered tag and
+        ingreedient rather than any of them """
+        match = self.request.query_params.get('match', 'any')
+        if match not in ('any', 'all'):
+            raise ValidationError({'match': _('Expected any or all.')})
+
+        return match == 'all'
+
+    def _filter_related(self, queryset, field, ids, match_all):
+        """ Filter recipes linked to any or all of ids through field
+        with an EXISTS subquery, so no recipe is returned twice """
+        relation = Recipe._meta.get_field(field)
+        target = relation.m2m_reverse_field_name()
+        ids = set(ids)
+        links = relation.remote_field.through.objects.filter(
+            recipe=OuterRef('pk'),
+            **{target + '__in': ids}
+        )
+        if match_all:
+            links = links.values('recipe').annotate(
+                matched=Count(target)
+            ).filter(matched=len(ids))
+
+        return queryset.filter(Exists(links))
+
+    def _search(self, queryset, text):
+        """ Filter recipes matching text and annotate their rank """
+        query = SearchQuery(text, config=SEARCH_CONFIG)
+        # Ranks are cast to double precision so the cursor position
+        # compares equal to the rank it was read from
+        return queryset.filter(search_vector=query).annotate(
+            rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+        )
+
+    def _prefetch_related(self, queryset):
+        """ Prefetch the relations serialized by the current action so
+        the query count does not grow with the number of recipes """
+        if self.action == 'list':
+            # The list only renders primary keys, so the join tables
+            # are enough
+            return queryset.prefetch_related(
+                Prefetch(
+                    'ingreedient',
+                    queryset=Ingreedient.objects.only('id')
+                ),
+                Prefetch('tags', queryset=Tag.objects.only('id')),
+            )
 
-        return queryset.filter(user=self.request.user)
+        elif self.action == 'retrieve':
+            return queryset.prefetch_related('ingreedient', 'tags')
+
+        return queryset
 
     def get_serializer_class(self):
         """ Return appropriate serializer class """
-        if self.action == 'retrieve':
-            return serializers.RecipeDetailSerializer
+        if self.action == 'list':
+            return serializers.RecipeReadSerializer
+
+        elif self.action == 'retrieve':
+            return serializers.RecipeDetailReadSerializer
 
         elif self.action == 'upload_image':
             return serializers.RecipeImageUploadSerializer
@@ -87,10 +201,12 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """ Create a new recipe """
         serializer.save(user=self.request.user)
 
-    @action(methods=['POST'], detail=True, url_path='upload-image')
+    @action(methods=['POST'], detail=True, url_path='upload-image',
+            parser_classes=[StreamingImageParser])
     def upload_image(self, request, pk=None):
         """ Upload an image to a recipe """
         recipe = self.get_object()
+        replaced = recipe.image.name
         serializers = self.get_serializer(
             recipe,
             data=request.data
@@ -98,11 +214,13 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         if serializers.is_valid():
             serializers.save()
+            images.schedule_variants(recipe, replaced)
             return Response(
                 serializers.data,
                 status=status.HTTP_200_OK
             )
 
+        discard_uploads(request.FILES)
         return Response(
             serializers.errors,
             status=status.HTTP_400_BAD_REQUEST
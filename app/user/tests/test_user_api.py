@@ -5,6 +5,8 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core.renderers import FastJSONRenderer
+
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
 UPDATE_USER_URL = reverse('user:me')
@@ -71,6 +73,20 @@ class PublicUserApiTest(TestCase):
         self.assertIn('token', res.data)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_create_token_json(self):
+        """ Test the token endpoint parses and renders JSON """
+        payload = {
+            'email': 'json@gmail.com',
+            'password': 'test@123'
+        }
+        create_user(**payload)
+
+        res = self.client.post(TOKEN_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(res.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(res.json()['token'], res.data['token'])
+
     def test_create_token_invalid_credentials(self):
         """ Testing weather the token is generaating for
         the invalid credentials """
@@ -1,7 +1,8 @@
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from user.serializers import UserSerializer, AuthTokenSerializer
 from rest_framework.settings import api_settings
+from core.authentication import CachedTokenAuthentication
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -13,12 +14,13 @@ class CreateTokenView(ObtainAuthToken):
     """ Create token api view """
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """ Manage the authenicated user """
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):